@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+ATS Batch Ranker
+Rank a folder of resumes against one job description without the GUI.
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ats_screener import ATSMatcher
+
+# Resume file types read by the batch ranker
+RESUME_EXTENSIONS = (".txt", ".md", ".text")
+
+# Job description keywords and phrases, set once per worker process
+_worker_job = None
+
+
+class JobDescription:
+    """A job description tokenized once and reused for every resume."""
+
+    def __init__(self, text, matcher=None):
+        self.matcher = matcher or ATSMatcher()
+        keywords, phrases = self.matcher.extract_keywords(text)
+        self.keywords = frozenset(keywords)
+        self.phrases = frozenset(phrases)
+
+    def score(self, resume_text):
+        """Score one resume against this job description."""
+        resume_keywords, resume_phrases = self.matcher.extract_keywords(resume_text)
+        return self.matcher.calculate_match_score(
+            self.keywords, resume_keywords,
+            self.phrases, resume_phrases
+        )
+
+
+class TopK:
+    """Keeps the k best-scoring items seen so far in a bounded min-heap."""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.seen = 0
+
+    def push(self, score, resume_id, result):
+        self.seen += 1
+        # Ties go to the lexically smaller id, so rankings are reproducible
+        entry = (score, _Reversed(resume_id), result)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def results(self):
+        """Return (resume_id, result) pairs, best first."""
+        ranked = sorted(self.heap, reverse=True)
+        return [(entry[1].value, entry[2]) for entry in ranked]
+
+
+class _Reversed:
+    """Orders strings in reverse, for tie-breaking inside the min-heap."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def iter_resume_files(directory, extensions=RESUME_EXTENSIONS):
+    """Yield resume file paths under directory, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                yield os.path.join(root, name)
+
+
+def read_text(path):
+    """Read a text resume, tolerating stray bytes."""
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        return handle.read()
+
+
+def _summary(result):
+    """Keep only the numbers of a match result, so results stay small."""
+    return {
+        "overall_score": result["overall_score"],
+        "keyword_score": result["keyword_score"],
+        "phrase_score": result["phrase_score"],
+        "matched_keywords": len(result["matched_keywords"]),
+        "missing_keywords": len(result["missing_keywords"])
+    }
+
+
+def _init_worker(job):
+    global _worker_job
+    _worker_job = job
+
+
+def _score_paths(paths):
+    """Score a chunk of resume files inside a worker."""
+    scored = []
+    for path in paths:
+        try:
+            result = _worker_job.score(read_text(path))
+        except OSError:
+            continue
+        scored.append((path, _summary(result)))
+    return scored
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rank_resumes(job_text, paths, top_k=20, workers=1, chunk_size=64):
+    """Rank resume files against a job description and return the top k.
+
+    The job description is tokenized once. Resumes are streamed, so only k
+    results and a bounded number of in-flight chunks are held in memory.
+    Returns (ranked, seen) where ranked is a list of (path, summary).
+    """
+    job = JobDescription(job_text)
+    best = TopK(top_k)
+
+    if workers <= 1:
+        _init_worker(job)
+        for chunk in _chunks(paths, chunk_size):
+            for path, summary in _score_paths(chunk):
+                best.push(summary["overall_score"], path, summary)
+        return best.results(), best.seen
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(job,)
+    ) as executor:
+        pending = deque()
+        for chunk in _chunks(paths, chunk_size):
+            pending.append(executor.submit(_score_paths, chunk))
+            while len(pending) >= workers * 4:
+                for path, summary in pending.popleft().result():
+                    best.push(summary["overall_score"], path, summary)
+        while pending:
+            for path, summary in pending.popleft().result():
+                best.push(summary["overall_score"], path, summary)
+    return best.results(), best.seen
+
+
+def write_results(ranked, handle, output_format):
+    """Write ranked results as a table, CSV or JSONL.
+
+    Summaries from the vector engines carry a "score" that is shown next to
+    the 70/30 keyword scores.
+    """
+    if output_format == "jsonl":
+        for rank, (path, summary) in enumerate(ranked, 1):
+            handle.write(json.dumps({"rank": rank, "resume": path, **summary}) + "\n")
+        return
+    has_score = bool(ranked) and "score" in ranked[0][1]
+    percent_fields = ["overall_score", "keyword_score", "phrase_score"]
+    if output_format == "csv":
+        writer = csv.writer(handle)
+        writer.writerow(["rank", "resume"] + (["score"] if has_score else []) + percent_fields)
+        for rank, (path, summary) in enumerate(ranked, 1):
+            row = [rank, path] + ([f"{summary['score']:.4f}"] if has_score else [])
+            row += [f"{summary[field]:.1f}" if field in summary else "" for field in percent_fields]
+            writer.writerow(row)
+        return
+    for rank, (path, summary) in enumerate(ranked, 1):
+        line = f"{rank:>4}. "
+        if has_score:
+            line += f"score {summary['score']:8.4f}  "
+        if "overall_score" in summary:
+            line += (
+                f"{summary['overall_score']:5.1f}%  "
+                f"(keywords {summary['keyword_score']:5.1f}%, phrases {summary['phrase_score']:5.1f}%)  "
+            )
+        handle.write(line + f"{path}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank resumes against a job description")
+    parser.add_argument("job_description", help="text file with the job description")
+    parser.add_argument("resumes", help="directory of resume files")
+    parser.add_argument("-k", "--top", type=int, default=20, help="number of resumes to return")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    ranked, seen = rank_resumes(
+        read_text(args.job_description),
+        iter_resume_files(args.resumes),
+        args.top,
+        args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    handle = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        write_results(ranked, handle, args.format)
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    rate = seen / elapsed if elapsed > 0 else 0.0
+    print(f"Ranked {seen} resumes in {elapsed:.1f}s ({rate:.0f} resumes/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
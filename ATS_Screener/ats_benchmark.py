@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+ATS Benchmarks
+Headless timings, allocations and scaling of the ATS text pipeline.
+"""
+
+import argparse
+import cProfile
+import math
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+
+from ats_batch import JobDescription, TopK
+from ats_index import ResumeIndex
+from ats_screener import ATSMatcher, STOP_WORDS
+from ats_vector import ResumeMatrix
+
+SKILLS = [
+    "python", "java", "sql", "aws", "docker", "kubernetes", "react", "linux",
+    "terraform", "spark", "git", "machine learning", "data pipelines",
+    "continuous integration", "rest apis", "microservices", "c++", "c#",
+    "project management", "stakeholder communication", "agile", "testing"
+]
+
+FILLER = [
+    "built", "delivered", "scalable", "systems", "customers", "team", "led",
+    "designed", "improved", "platform", "services", "reliability", "reduced",
+    "latency", "migrated", "owned", "mentored", "engineers", "launched"
+]
+
+
+def synthetic_text(words, rng):
+    """Return roughly words words of resume-like prose with skills and stop words."""
+    stop_words = sorted(STOP_WORDS)
+    pieces = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.15:
+            pieces.append(rng.choice(SKILLS) + ",")
+        elif roll < 0.45:
+            pieces.append(rng.choice(stop_words))
+        elif roll < 0.5:
+            pieces.append(f"{rng.randrange(2, 15)} years.")
+        else:
+            pieces.append(rng.choice(FILLER))
+    return " ".join(pieces)
+
+
+def best_time(function, repeat):
+    """Return the fastest of repeat timed runs of function."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def allocations(function):
+    """Return (peak traced bytes, blocks the stage allocated and still holds).
+
+    Both come from tracemalloc: the block count sums Statistic.count over a
+    snapshot taken while the result is alive, so only memory allocated by
+    the stage is counted and temporaries freed on the way are not.
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(statistic.count for statistic in snapshot.statistics("filename"))
+    return peak, blocks
+
+
+def pipeline_stages(jd_text, resume_text, matcher):
+    """Return the pipeline as (name, function) pairs, each stage fed by the previous."""
+    jd = matcher.extract_keywords(jd_text)
+    resume = matcher.extract_keywords(resume_text)
+    return [
+        ("extract_jd", lambda: matcher.extract_keywords(jd_text)),
+        ("extract_resume", lambda: matcher.extract_keywords(resume_text)),
+        ("match_score", lambda: matcher.calculate_match_score(jd[0], resume[0], jd[1], resume[1]))
+    ]
+
+
+def scaling_exponent(sizes, times):
+    """Least-squares slope of log(time) against log(size); 1.0 means linear."""
+    points = [(math.log(size), math.log(seconds)) for size, seconds in zip(sizes, times) if seconds > 0]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else float("nan")
+
+
+def run_stages(sizes, repeat, seed, profile_path=None):
+    """Time every stage at every resume size and print a scaling summary."""
+    matcher = ATSMatcher()
+    rng = random.Random(seed)
+    timings = {}
+    print(f"{'words':>9}  {'stage':<15}{'ms':>10}{'words/s':>13}{'peak KB':>10}{'held blocks':>12}")
+    for size in sizes:
+        # The job description grows with the resume, at a fifth of its length
+        jd_text = synthetic_text(max(50, size // 5), rng)
+        resume_text = synthetic_text(size, rng)
+        for name, function in pipeline_stages(jd_text, resume_text, matcher):
+            seconds = best_time(function, repeat)
+            peak, blocks = allocations(function)
+            timings.setdefault(name, []).append(seconds)
+            words = max(50, size // 5) if name == "extract_jd" else size
+            rate = words / seconds if seconds > 0 else 0.0
+            print(f"{size:>9}  {name:<15}{seconds * 1000:>10.3f}{rate:>13.0f}{peak / 1024:>10.0f}{blocks:>12}")
+
+    print("\nScaling exponent of time against size (1.0 = linear):")
+    for name, times in timings.items():
+        print(f"  {name:<15}{scaling_exponent(sizes, times):>6.2f}")
+
+    if profile_path:
+        jd_text = synthetic_text(max(50, sizes[-1] // 5), rng)
+        resume_text = synthetic_text(sizes[-1], rng)
+        stages = pipeline_stages(jd_text, resume_text, matcher)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for _, function in stages:
+            for _ in range(repeat):
+                function()
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        print(f"\nProfile of {sizes[-1]} words written to {profile_path}")
+        pstats.Stats(profile_path).sort_stats("cumulative").print_stats(15)
+
+
+def keyword_engine(corpus):
+    """The current engine: extract_keywords and calculate_match_score per resume."""
+    def query(job_text, top_k):
+        job = JobDescription(job_text)
+        best = TopK(top_k)
+        for name, text in corpus:
+            best.push(job.score(text)["overall_score"], name, None)
+        return [name for name, _ in best.results()]
+    return query
+
+
+def index_engine(corpus):
+    index = ResumeIndex(":memory:")
+    index.add_many(corpus)
+    return lambda job_text, top_k: [name for name, _ in index.query(job_text, top_k)]
+
+
+def vector_engine(method):
+    def build(corpus):
+        matrix = ResumeMatrix().build(corpus)
+        return lambda job_text, top_k: [name for name, _ in matrix.rank(job_text, top_k, method)]
+    return build
+
+
+# Each engine builds from a list of (name, text) and returns query(job_text, top_k)
+ENGINES = {
+    "keyword": keyword_engine,
+    "index": index_engine,
+    "bm25": vector_engine("bm25"),
+    "tfidf": vector_engine("tfidf")
+}
+
+
+def run_engines(names, resumes, words, queries, top_k, seed):
+    """Compare ranking engines on one corpus; returns {engine: resumes/s}."""
+    rng = random.Random(seed)
+    corpus = [(f"resume-{i:06d}", synthetic_text(words, rng)) for i in range(resumes)]
+    jobs = [synthetic_text(max(50, words // 2), rng) for _ in range(queries)]
+
+    baseline = None
+    throughput = {}
+    print(f"{'engine':<10}{'build s':>9}{'query ms':>10}{'resumes/s':>12}{'speedup':>9}{'overlap@k':>11}")
+    for name in names:
+        start = time.perf_counter()
+        query = ENGINES[name](corpus)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [query(job, top_k) for job in jobs]
+        query_time = (time.perf_counter() - start) / queries
+        throughput[name] = resumes / query_time if query_time > 0 else float("inf")
+
+        if baseline is None:
+            baseline = (throughput[name], results)
+        overlap = sum(
+            len(set(result) & set(reference)) / max(len(reference), 1)
+            for result, reference in zip(results, baseline[1])
+        ) / queries
+        print(
+            f"{name:<10}{build_time:>9.2f}{query_time * 1000:>10.2f}{throughput[name]:>12.0f}"
+            f"{throughput[name] / baseline[0]:>8.1f}x{overlap:>11.2f}"
+        )
+    return throughput
+
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ATS text pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stages = commands.add_parser("stages", help="per-stage timings, allocations and scaling")
+    stages.add_argument("--sizes", type=parse_sizes, default=[100, 1000, 10000, 100000], help="resume words")
+    stages.add_argument("--repeat", type=int, default=3)
+    stages.add_argument("--seed", type=int, default=0)
+    stages.add_argument("--profile", help="also write a cProfile dump of the largest size here")
+
+    engines = commands.add_parser("engines", help="ranking throughput of each engine against keyword")
+    engines.add_argument("--engines", default=",".join(ENGINES), help="comma-separated, first is the baseline")
+    engines.add_argument("--resumes", type=int, default=2000)
+    engines.add_argument("--words", type=int, default=300, help="words per resume")
+    engines.add_argument("--queries", type=int, default=5)
+    engines.add_argument("-k", "--top", type=int, default=20)
+    engines.add_argument("--seed", type=int, default=0)
+    engines.add_argument("--fail-slower", action="store_true", help="exit 1 if any engine is slower than the baseline")
+
+    args = parser.parse_args(argv)
+    if args.command == "stages":
+        run_stages(args.sizes, args.repeat, args.seed, args.profile)
+        return
+
+    names = args.engines.split(",")
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+    throughput = run_engines(names, args.resumes, args.words, args.queries, args.top, args.seed)
+    if args.fail_slower and any(rate < throughput[names[0]] for rate in throughput.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+ATS Near-Duplicate Detection
+MinHash signatures and an LSH index that find resubmitted resumes.
+"""
+
+import argparse
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from ats_batch import iter_resume_files, read_text
+from ats_screener import ATSMatcher
+
+# Largest prime below 2**32; every (a * x + b) fits in 64 bits before the modulo
+MINHASH_PRIME = np.uint64(4294967291)
+
+
+class MinHasher:
+    """MinHash signatures of keyword and bigram shingle sets.
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the two shingle sets.
+    """
+
+    def __init__(self, num_perm=128, seed=1, matcher=None):
+        self.num_perm = num_perm
+        self.matcher = matcher or ATSMatcher()
+        rng = np.random.default_rng(seed)
+        prime = int(MINHASH_PRIME)
+        self.a = rng.integers(1, prime, num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, prime, num_perm, dtype=np.uint64)[:, None]
+
+    def signature_of(self, keywords, phrases):
+        """Signature of the shingles from an extract_keywords result.
+
+        Returns None when there are no shingles, e.g. for a scanned PDF with
+        no extractable text; such resumes are never anyone's duplicate.
+        """
+        shingles = set(keywords)
+        shingles.update(phrases)
+        if not shingles:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        ) % MINHASH_PRIME
+        return ((self.a * hashes + self.b) % MINHASH_PRIME).min(axis=1).astype(np.uint32)
+
+    def signature(self, text):
+        return self.signature_of(*self.matcher.extract_keywords(text))
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(first == second))
+
+
+class DuplicateIndex:
+    """LSH index over MinHash signatures.
+
+    Signatures are cut into bands; two resumes become candidates when any
+    band matches exactly, so a lookup only compares against the few resumes
+    sharing a bucket. Candidates are confirmed by their estimated similarity.
+    """
+
+    def __init__(self, threshold=0.9, num_perm=128, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.names = []
+        # Signatures as rows of one growing array, so candidates are
+        # confirmed with a single vectorized comparison
+        self.signatures = np.zeros((64, num_perm), dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _band_keys(self, signature):
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [data[band * width:(band + 1) * width] for band in range(self.bands)]
+
+    def find(self, signature):
+        """Return (name, similarity) of the closest indexed near-duplicate, or None."""
+        candidates = set()
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        if not candidates:
+            return None
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        scores = (self.signatures[rows] == signature).mean(axis=1)
+        best = None
+        for row, score in zip(rows[scores >= self.threshold], scores[scores >= self.threshold]):
+            name = self.names[row]
+            # The most similar wins; ties go to the lexically smaller name
+            if best is None or score > best[1] or (score == best[1] and name < best[0]):
+                best = (name, float(score))
+        return best
+
+    def insert(self, name, signature):
+        row = len(self.names)
+        if row == len(self.signatures):
+            self.signatures = np.concatenate((self.signatures, np.zeros_like(self.signatures)))
+        self.signatures[row] = signature
+        self.names.append(name)
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(key, []).append(row)
+
+    def add(self, name, signature):
+        """Index a resume unless it duplicates one already indexed.
+
+        Returns the name of the earlier resume it duplicates, or None if it
+        was indexed as a new one. Resumes without a signature are neither
+        indexed nor matched.
+        """
+        if signature is None:
+            return None
+        match = self.find(signature)
+        if match is not None:
+            return match[0]
+        self.insert(name, signature)
+        return None
+
+
+def collapse(items, index=None, hasher=None):
+    """Split (name, text) pairs into unique resumes and duplicate groups.
+
+    Returns (unique, groups) where unique lists the first resume of each
+    group in input order and groups maps it to the names of its duplicates.
+    """
+    index = index or DuplicateIndex()
+    hasher = hasher or MinHasher(index.num_perm)
+    unique = []
+    groups = {}
+    for name, text in items:
+        original = index.add(name, hasher.signature(text))
+        if original is None:
+            unique.append(name)
+        else:
+            groups.setdefault(original, []).append(name)
+    return unique, groups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find near-duplicate resumes in a folder")
+    parser.add_argument("resumes", help="directory of resume files")
+    parser.add_argument("-t", "--threshold", type=float, default=0.9, help="estimated Jaccard similarity")
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    unique, groups = collapse(
+        ((path, read_text(path)) for path in iter_resume_files(args.resumes)),
+        DuplicateIndex(args.threshold, args.num_perm, args.bands)
+    )
+    elapsed = time.perf_counter() - start
+
+    for original, duplicates in groups.items():
+        print(original)
+        for duplicate in duplicates:
+            print(f"    {duplicate}")
+    duplicate_count = sum(len(duplicates) for duplicates in groups.values())
+    print(
+        f"{len(unique)} unique resumes, {duplicate_count} duplicates "
+        f"in {len(groups)} groups ({elapsed:.1f}s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+ATS Resume Index
+A persistent inverted index from keywords and phrases to resumes.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from ats_batch import iter_resume_files, read_text, write_results
+from ats_screener import ATSMatcher
+
+KEYWORD = 0
+PHRASE = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    keyword_count INTEGER NOT NULL,
+    phrase_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE,
+    kind INTEGER NOT NULL,
+    df INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    resume_id INTEGER NOT NULL,
+    PRIMARY KEY (term_id, resume_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_resume ON postings (resume_id);
+"""
+
+# Matched terms per resume over whole posting lists
+COUNT = """
+SELECT resume_id, COUNT(*) FROM postings
+WHERE term_id IN ({placeholders})
+GROUP BY resume_id
+"""
+
+# The same for the remaining candidates only, by index lookups instead of
+# reading whole posting lists (CROSS JOIN keeps candidates outermost)
+PROBE = """
+SELECT c.id, COUNT(*) FROM candidates c CROSS JOIN postings p
+ON p.resume_id = c.id AND p.term_id IN ({placeholders})
+GROUP BY c.id
+"""
+
+# An index lookup per candidate costs about this many sequentially read postings
+PROBE_COST = 4
+
+# Scores are compared with this much room for floating point rounding
+BOUND_SLACK = 1e-9
+
+
+class ResumeIndex:
+    """Inverted index of resume keywords and bigram phrases in SQLite.
+
+    Resumes are added or removed one at a time. Each term keeps its document
+    frequency, and terms left without postings are deleted. A job
+    description query only reads the postings of its own terms, and
+    MaxScore pruning skips most of the frequent ones (see query).
+    """
+
+    def __init__(self, path, matcher=None):
+        self.path = path
+        self.matcher = matcher or ATSMatcher()
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._upgrade()
+
+    def _upgrade(self):
+        """Bring an index written by an older version to the current schema."""
+        with self.db:
+            if "df" not in {row[1] for row in self.db.execute("PRAGMA table_info(terms)")}:
+                self.db.execute("ALTER TABLE terms ADD COLUMN df INTEGER NOT NULL DEFAULT 0")
+                self.db.execute("UPDATE terms SET df = (SELECT COUNT(*) FROM postings WHERE term_id = terms.id)")
+                self.db.execute("DELETE FROM terms WHERE df = 0")
+            if "tf" in {row[1] for row in self.db.execute("PRAGMA table_info(postings)")}:
+                self.db.executescript("""
+                    CREATE TABLE postings_new (
+                        term_id INTEGER NOT NULL,
+                        resume_id INTEGER NOT NULL,
+                        PRIMARY KEY (term_id, resume_id)
+                    ) WITHOUT ROWID;
+                    INSERT INTO postings_new SELECT term_id, resume_id FROM postings;
+                    DROP TABLE postings;
+                    ALTER TABLE postings_new RENAME TO postings;
+                    CREATE INDEX postings_by_resume ON postings (resume_id);
+                """)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def __contains__(self, name):
+        return self.db.execute("SELECT 1 FROM resumes WHERE name = ?", (name,)).fetchone() is not None
+
+    def _term_ids(self, terms, kind):
+        """Return {term: id} for terms, inserting unseen ones."""
+        self.db.executemany(
+            "INSERT OR IGNORE INTO terms (term, kind) VALUES (?, ?)",
+            ((term, kind) for term in terms)
+        )
+        ids = {}
+        terms = list(terms)
+        for start in range(0, len(terms), 500):
+            batch = terms[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            ids.update(self.db.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({placeholders})", batch
+            ))
+        return ids
+
+    def _add(self, name, text):
+        self._remove(name)
+        keywords, phrases = self.matcher.extract_keywords(text)
+        keywords = set(keywords)
+        phrases = set(phrases)
+        cursor = self.db.execute(
+            "INSERT INTO resumes (name, keyword_count, phrase_count) VALUES (?, ?, ?)",
+            (name, len(keywords), len(phrases))
+        )
+        resume_id = cursor.lastrowid
+        for terms, kind in ((keywords, KEYWORD), (phrases, PHRASE)):
+            term_ids = list(self._term_ids(terms, kind).values())
+            self.db.executemany(
+                "INSERT INTO postings (term_id, resume_id) VALUES (?, ?)",
+                ((term_id, resume_id) for term_id in term_ids)
+            )
+            self.db.executemany("UPDATE terms SET df = df + 1 WHERE id = ?", ((term_id,) for term_id in term_ids))
+
+    def _remove(self, name):
+        row = self.db.execute("SELECT id FROM resumes WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        term_ids = self.db.execute("SELECT term_id FROM postings WHERE resume_id = ?", row).fetchall()
+        self.db.execute("DELETE FROM postings WHERE resume_id = ?", row)
+        self.db.execute("DELETE FROM resumes WHERE id = ?", row)
+        self.db.executemany("UPDATE terms SET df = df - 1 WHERE id = ?", term_ids)
+        # Terms no other resume uses would otherwise pile up under churn
+        self.db.executemany("DELETE FROM terms WHERE id = ? AND df <= 0", term_ids)
+        return True
+
+    def add(self, name, text):
+        """Index one resume, replacing any earlier version with that name."""
+        with self.db:
+            self._add(name, text)
+
+    def add_many(self, items):
+        """Index (name, text) pairs in a single transaction."""
+        count = 0
+        with self.db:
+            for name, text in items:
+                self._add(name, text)
+                count += 1
+        return count
+
+    def remove(self, name):
+        """Drop a resume from the index; returns False if it was not there."""
+        with self.db:
+            return self._remove(name)
+
+    def _count(self, terms, matched, sql=COUNT):
+        """Add each resume's matches among terms, as (df, id, kind), to matched."""
+        for kind in (KEYWORD, PHRASE):
+            ids = [term_id for _, term_id, term_kind in terms if term_kind == kind]
+            if not ids:
+                continue
+            rows = self.db.execute(sql.format(placeholders=",".join("?" * len(ids))), ids).fetchall()
+            if rows:
+                counts = np.array(rows, dtype=np.int64)
+                matched[kind, counts[:, 0]] += counts[:, 1].astype(matched.dtype)
+
+    def _set_candidates(self, candidates):
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (id INTEGER PRIMARY KEY)")
+        self.db.execute("DELETE FROM candidates")
+        self.db.executemany("INSERT INTO candidates VALUES (?)", ((int(i),) for i in candidates))
+
+    def query(self, job_text, top_k=20):
+        """Rank indexed resumes against a job description.
+
+        Returns (name, summary) pairs, best first, with the same score
+        fields as ats_batch.rank_resumes. Resumes sharing no term with the
+        job description score zero and are left out.
+
+        Pruning is MaxScore-style and exact. Every matched term adds a fixed
+        weight, so terms are read rarest first, counting whole posting
+        lists. Once the k-th best partial score beats the weight of the
+        terms still unread, no unseen resume can make the top k, and the
+        frequent terms left are only checked for the remaining candidates.
+        Terms that most resumes share are still read in full, so the cost
+        stays linear in the corpus for typical job descriptions.
+        """
+        keywords, phrases = self.matcher.extract_keywords(job_text)
+        keywords = set(keywords)
+        phrases = set(phrases)
+        if not keywords and not phrases or top_k <= 0:
+            return []
+
+        # What one matched term adds to the overall score, per kind
+        weights = np.array([
+            0.7 / len(keywords) if keywords else 0.0,
+            0.3 / len(phrases) if phrases else 0.0
+        ])
+        terms = []
+        query_terms = list(keywords | phrases)
+        for start in range(0, len(query_terms), 500):
+            batch = query_terms[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            terms.extend(self.db.execute(
+                f"SELECT df, id, kind FROM terms WHERE term IN ({placeholders})", batch
+            ))
+        if not terms:
+            return []
+        terms.sort()
+
+        size = self.db.execute("SELECT MAX(id) FROM resumes").fetchone()[0] + 1
+        matched = np.zeros((2, size), dtype=np.int32)
+        remaining = sum(weights[kind] for _, _, kind in terms)
+
+        def kth_score():
+            scores = weights @ matched
+            if np.count_nonzero(scores) < top_k:
+                return scores, 0.0
+            return scores, np.partition(scores, -top_k)[-top_k]
+
+        # Rare terms first: count whole posting lists while unseen resumes
+        # may still qualify. Each round reads about twice the postings of the
+        # one before, starting from one per resume, so the bound is checked
+        # a logarithmic number of times.
+        position = 0
+        budget = size
+        while position < len(terms):
+            if position:
+                scores, threshold = kth_score()
+                if threshold > remaining + BOUND_SLACK:
+                    break
+            end = position + 1
+            postings = terms[position][0]
+            while end < len(terms) and postings + terms[end][0] <= budget:
+                postings += terms[end][0]
+                end += 1
+            budget *= 2
+            self._count(terms[position:end], matched)
+            remaining -= sum(weights[kind] for _, _, kind in terms[position:end])
+            position = end
+
+        # Frequent terms: only resumes that can still reach the top k
+        if position < len(terms):
+            scores, threshold = kth_score()
+            candidates = np.flatnonzero((scores > 0) & (scores + remaining >= threshold - BOUND_SLACK))
+            self._set_candidates(candidates)
+            stored = len(candidates)
+        for term in terms[position:]:
+            df, _, kind = term
+            if df <= len(candidates) * PROBE_COST:
+                self._count([term], matched)
+            else:
+                if len(candidates) < stored // 2:
+                    self._set_candidates(candidates)
+                    stored = len(candidates)
+                # Stale rows only add matches to resumes already ruled out
+                self._count([term], matched, PROBE)
+            remaining -= weights[kind]
+            scores, threshold = kth_score()
+            candidates = candidates[scores[candidates] + remaining >= threshold - BOUND_SLACK]
+
+        # Exact scores for the survivors, in the order the 0.7/0.3 formula gives
+        candidates = np.flatnonzero(matched.any(axis=0)) if position == len(terms) else candidates
+        keyword_matches = matched[0, candidates]
+        phrase_matches = matched[1, candidates]
+        overall = (0.7 * keyword_matches / (len(keywords) or 1)) + (0.3 * phrase_matches / (len(phrases) or 1))
+        if len(candidates) > top_k:
+            # Keep ties with the k-th score, which are broken by name
+            cutoff = np.partition(overall, -top_k)[-top_k]
+            keep = overall >= cutoff
+            candidates, keyword_matches, phrase_matches = candidates[keep], keyword_matches[keep], phrase_matches[keep]
+            overall = overall[keep]
+
+        names = {}
+        ids = [int(i) for i in candidates]
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            names.update(self.db.execute(f"SELECT id, name FROM resumes WHERE id IN ({placeholders})", batch))
+        order = sorted(range(len(ids)), key=lambda i: (-overall[i], names[ids[i]]))[:top_k]
+
+        ranked = []
+        for i in order:
+            matched_keywords = int(keyword_matches[i])
+            matched_phrases = int(phrase_matches[i])
+            keyword_score = matched_keywords / len(keywords) * 100 if keywords else 0
+            phrase_score = matched_phrases / len(phrases) * 100 if phrases else 0
+            ranked.append((names[ids[i]], {
+                "overall_score": keyword_score * 0.7 + phrase_score * 0.3,
+                "keyword_score": keyword_score,
+                "phrase_score": phrase_score,
+                "matched_keywords": matched_keywords,
+                "missing_keywords": len(keywords) - matched_keywords
+            }))
+        return ranked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query a persistent resume index")
+    parser.add_argument("index", help="index database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="index every resume in a directory")
+    add.add_argument("resumes")
+    add.add_argument("--update", action="store_true", help="re-index resumes already in the index")
+
+    remove = commands.add_parser("remove", help="drop resumes by path")
+    remove.add_argument("names", nargs="+")
+
+    query = commands.add_parser("query", help="rank indexed resumes against a job description")
+    query.add_argument("job_description")
+    query.add_argument("-k", "--top", type=int, default=20)
+    query.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+
+    args = parser.parse_args(argv)
+    with ResumeIndex(args.index) as index:
+        start = time.perf_counter()
+        if args.command == "add":
+            paths = (path for path in iter_resume_files(args.resumes) if args.update or path not in index)
+            count = index.add_many((path, read_text(path)) for path in paths)
+            print(f"Indexed {count} resumes ({len(index)} total)", file=sys.stderr)
+        elif args.command == "remove":
+            removed = sum(index.remove(name) for name in args.names)
+            print(f"Removed {removed} resumes ({len(index)} total)", file=sys.stderr)
+        else:
+            ranked = index.query(read_text(args.job_description), args.top)
+            write_results(ranked, sys.stdout, args.format)
+        elapsed = time.perf_counter() - start
+        print(f"Done in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+ATS Resume Ingestion
+Extract text from PDF, DOCX and plain text resumes in parallel.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+import numpy as np
+
+from ats_batch import RESUME_EXTENSIONS, _chunks, iter_resume_files, read_text
+from ats_dedupe import DuplicateIndex, MinHasher
+from ats_screener import ATSMatcher
+
+# pypdf is optional; without it PDF resumes are reported as failures
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+INGEST_EXTENSIONS = RESUME_EXTENSIONS + (".pdf", ".docx")
+
+MANIFEST_NAME = "manifest.json"
+
+# The manifest is rewritten after this many processed files, so an
+# interrupted run loses at most this much work
+CHECKPOINT_EVERY = 200
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_matcher = None
+_hasher = None
+
+
+def extract_pdf(path):
+    """Return the text of a PDF, page by page."""
+    if not PYPDF_AVAILABLE:
+        raise RuntimeError("pypdf is not installed")
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_docx(path):
+    """Return the paragraph text of a DOCX file, using only the standard library."""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(WORD_NAMESPACE + "p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == WORD_NAMESPACE + "t" and node.text:
+                parts.append(node.text)
+            elif node.tag == WORD_NAMESPACE + "tab":
+                parts.append("\t")
+            elif node.tag in (WORD_NAMESPACE + "br", WORD_NAMESPACE + "cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def extract_text(path):
+    """Return the text of a resume file, chosen by extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return extract_pdf(path)
+    if extension == ".docx":
+        return extract_docx(path)
+    return read_text(path)
+
+
+def file_hash(path):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _init_worker(dedupe=False):
+    global _matcher, _hasher
+    _matcher = ATSMatcher()
+    _hasher = MinHasher(matcher=_matcher) if dedupe else None
+
+
+def _write_text(path, output_path):
+    """Extract path into output_path and return the text."""
+    text = extract_text(path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    return text
+
+
+def _ingest_one(path, output_path, known_hash):
+    """Hash, extract and tokenize one file inside a worker.
+
+    Returns a manifest record. Files whose content still matches known_hash
+    are not extracted again; the record is marked unchanged.
+    """
+    record = {}
+    try:
+        # The file may have gone or become unreadable since the directory walk
+        stat = os.stat(path)
+        record.update(size=stat.st_size, mtime=stat.st_mtime)
+        record["sha256"] = file_hash(path)
+        if record["sha256"] == known_hash:
+            record["unchanged"] = True
+            return record
+        text = _write_text(path, output_path)
+        keywords, phrases = _matcher.extract_keywords(text)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+    record.update(text=output_path, keywords=len(set(keywords)), phrases=len(set(phrases)))
+    if _hasher is not None:
+        signature = _hasher.signature_of(keywords, phrases)
+        record["minhash"] = None if signature is None else signature.tobytes().hex()
+    return record
+
+
+def _ingest_chunk(jobs):
+    return [(path, _ingest_one(path, output_path, known_hash)) for path, output_path, known_hash in jobs]
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest, path):
+    """Atomically write the manifest, so a crash never leaves it half written."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".manifest_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def mark_duplicates(manifest, dedupe=True, threshold=0.9):
+    """Collapse near-duplicate resumes in a manifest; returns how many.
+
+    Resumes are visited in path order, so the first of each group is kept.
+    Later copies get duplicate_of and lose their extracted text, so ranking
+    the output folder scores each group once. Resumes that are no longer
+    duplicates, or all of them when dedupe is off, get their text back.
+    """
+    index = DuplicateIndex(threshold)
+    hasher = None
+    duplicates = 0
+    for path in sorted(manifest):
+        record = manifest[path]
+        if "error" in record:
+            continue
+        original = None
+        if dedupe:
+            if "minhash" in record:
+                minhash = record["minhash"]
+                signature = None if minhash is None else np.frombuffer(bytes.fromhex(minhash), dtype=np.uint32)
+            else:
+                # Extracted before deduplication was switched on
+                hasher = hasher or MinHasher()
+                signature = hasher.signature(read_text(record["text"]))
+                record["minhash"] = None if signature is None else signature.tobytes().hex()
+            original = index.add(path, signature)
+
+        if original is not None:
+            record["duplicate_of"] = original
+            duplicates += 1
+            try:
+                os.unlink(record["text"])
+            except FileNotFoundError:
+                pass
+        elif record.pop("duplicate_of", None) is not None:
+            try:
+                _write_text(path, record["text"])
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+    return duplicates
+
+
+class IngestReport:
+    """Counters for one ingestion run."""
+
+    def __init__(self):
+        self.extracted = 0
+        self.skipped = 0
+        self.removed = 0
+        self.duplicates = 0
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def files_per_second(self):
+        processed = self.extracted + self.skipped + len(self.failures)
+        return processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.extracted} extracted, {self.skipped} unchanged, "
+            f"{len(self.failures)} failed, {self.removed} removed, "
+            f"{self.duplicates} duplicates "
+            f"in {self.elapsed:.1f}s ({self.files_per_second:.0f} files/s)"
+        )
+
+
+def ingest(source, output, workers=1, chunk_size=16, manifest_path=None, dedupe=False):
+    """Extract every resume under source into .txt files under output.
+
+    The manifest maps each source file to its size, mtime, content hash and
+    extracted text file. Files whose size and mtime are unchanged are skipped
+    without being read; touched files whose hash is unchanged are skipped
+    without being extracted. Failed files are retried on the next run.
+    With dedupe, near-duplicate resumes are collapsed by mark_duplicates.
+    Returns an IngestReport.
+    """
+    manifest_path = manifest_path or os.path.join(output, MANIFEST_NAME)
+    os.makedirs(output, exist_ok=True)
+    previous = load_manifest(manifest_path)
+    manifest = {}
+    report = IngestReport()
+    unsaved = [0]
+    start = time.perf_counter()
+
+    # An output folder inside source must not be ingested as resumes itself
+    output_prefix = os.path.join(os.path.abspath(output), "")
+
+    def jobs():
+        for path in iter_resume_files(source, INGEST_EXTENSIONS):
+            if os.path.abspath(path).startswith(output_prefix):
+                continue
+            entry = previous.get(path)
+            if entry and "error" not in entry:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stat = None  # the worker reports it
+                if stat and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                    manifest[path] = entry
+                    report.skipped += 1
+                    continue
+            output_path = os.path.join(output, os.path.relpath(path, source) + ".txt")
+            known_hash = entry.get("sha256") if entry and "error" not in entry else None
+            yield path, output_path, known_hash
+
+    def collect(results):
+        for path, record in results:
+            if "error" in record:
+                report.failures.append((path, record["error"]))
+            elif record.pop("unchanged", False):
+                for field in ("text", "keywords", "phrases", "minhash", "duplicate_of"):
+                    if field in previous[path]:
+                        record[field] = previous[path][field]
+                report.skipped += 1
+            else:
+                report.extracted += 1
+            manifest[path] = record
+            unsaved[0] += 1
+            if unsaved[0] >= CHECKPOINT_EVERY:
+                # Entries not reached yet are kept, so they stay skippable
+                save_manifest({**previous, **manifest}, manifest_path)
+                unsaved[0] = 0
+
+    chunks = _chunks(jobs(), chunk_size)
+    if workers <= 1:
+        _init_worker(dedupe)
+        for chunk in chunks:
+            collect(_ingest_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(dedupe,)
+        ) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_ingest_chunk, chunk))
+                while len(pending) >= workers * 4:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    # Files that disappeared from source take their extracted text with them
+    for path, entry in previous.items():
+        if path not in manifest:
+            report.removed += 1
+            if "text" in entry:
+                try:
+                    os.unlink(entry["text"])
+                except FileNotFoundError:
+                    pass
+
+    report.duplicates = mark_duplicates(manifest, dedupe)
+    save_manifest(manifest, manifest_path)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text from a folder of PDF, DOCX and text resumes")
+    parser.add_argument("resumes", help="directory of resume files")
+    parser.add_argument("output", help="directory for the extracted .txt files")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", help=f"manifest file (default: OUTPUT/{MANIFEST_NAME})")
+    parser.add_argument("--dedupe", action="store_true", help="collapse near-duplicate resumes")
+    args = parser.parse_args(argv)
+
+    report = ingest(args.resumes, args.output, args.workers, manifest_path=args.manifest, dedupe=args.dedupe)
+    for path, error in report.failures:
+        print(f"failed: {path}: {error}", file=sys.stderr)
+    print(report, file=sys.stderr)
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+ATS N-gram Phrases
+Hashed n-gram phrase sets for matching at corpus scale.
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from ats_batch import iter_resume_files, read_text
+from ats_screener import STOP_WORDS
+
+# The same tokens as extract_keywords: runs of letters, digits, + and #
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+", re.IGNORECASE | re.ASCII)
+
+# Multiplier of the polynomial that combines token hashes into an n-gram hash
+NGRAM_MULTIPLIER = np.uint64(0x100000001B3)
+
+# Phrases this short or shorter are ignored, as in extract_keywords
+MIN_PHRASE_LENGTH = 5
+
+
+@lru_cache(maxsize=1 << 16)
+def token_info(token):
+    """Return (hash, length, is stop word) of a token, stable across runs."""
+    token = token.lower()
+    digest = hashlib.blake2b(token.encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "little"), len(token), token in STOP_WORDS
+
+
+def _mix(hashes):
+    """Final avalanche step, so related n-grams get unrelated hashes."""
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= np.uint64(0xFF51AFD7ED558CCD)
+    hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+
+class PhraseSet:
+    """A set of n-gram hashes, stored as one sorted uint64 array.
+
+    Eight bytes per distinct phrase, against roughly a hundred for a Python
+    set of phrase strings.
+    """
+
+    __slots__ = ("hashes",)
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, phrase_hash):
+        position = np.searchsorted(self.hashes, np.uint64(phrase_hash))
+        return position < len(self.hashes) and self.hashes[position] == phrase_hash
+
+    @property
+    def nbytes(self):
+        return self.hashes.nbytes
+
+    def intersection_count(self, other):
+        """Number of phrases in both sets."""
+        return len(np.intersect1d(self.hashes, other.hashes, assume_unique=True))
+
+    def coverage(self, other):
+        """Percentage of this set's phrases that also appear in other."""
+        return self.intersection_count(other) / len(self) * 100 if len(self) else 0
+
+
+class NGramExtractor:
+    """Extracts n-gram phrases of several lengths in one pass over the tokens.
+
+    Like the bigrams of extract_keywords, a phrase is kept unless every word
+    in it is a stop word or it is at most five characters long. Each phrase
+    is reduced to a 64-bit hash, and duplicates are dropped.
+    """
+
+    def __init__(self, n=(2, 3)):
+        self.n = tuple(sorted(set(n)))
+        if not self.n or self.n[0] < 1:
+            raise ValueError("n-gram sizes must be positive")
+
+    def token_arrays(self, text):
+        """Return the hash, length and stop-word flag of every token."""
+        infos = [token_info(token) for token in TOKEN_PATTERN.findall(text)]
+        if not infos:
+            empty = np.zeros(0, dtype=np.uint64)
+            return empty, empty.astype(np.int64), empty.astype(bool)
+        hashes, lengths, stops = zip(*infos)
+        return (
+            np.array(hashes, dtype=np.uint64),
+            np.array(lengths, dtype=np.int64),
+            np.array(stops, dtype=bool)
+        )
+
+    def hashes(self, text):
+        """Return the sorted, distinct n-gram hashes of a text."""
+        tokens, lengths, stops = self.token_arrays(text)
+        length_sums = np.concatenate(([0], np.cumsum(lengths)))
+        stop_sums = np.concatenate(([0], np.cumsum(stops)))
+        parts = []
+        for n in self.n:
+            count = len(tokens) - n + 1
+            if count <= 0:
+                continue
+            # Seeding with n keeps "a b" and "a b c" prefixes apart
+            combined = np.full(count, n, dtype=np.uint64)
+            for offset in range(n):
+                combined = combined * NGRAM_MULTIPLIER + tokens[offset:offset + count]
+            # Phrase length includes the n - 1 joining spaces
+            text_length = length_sums[n:] - length_sums[:count] + (n - 1)
+            all_stop = stop_sums[n:] - stop_sums[:count] == n
+            parts.append(_mix(combined[(text_length > MIN_PHRASE_LENGTH) & ~all_stop]))
+        if not parts:
+            return np.zeros(0, dtype=np.uint64)
+        return np.unique(np.concatenate(parts))
+
+    def phrase_set(self, text):
+        return PhraseSet(self.hashes(text))
+
+    def phrases(self, text):
+        """Yield the phrase strings of a text, for display; may repeat."""
+        words = [token.lower() for token in TOKEN_PATTERN.findall(text)]
+        for n in self.n:
+            for start in range(len(words) - n + 1):
+                window = words[start:start + n]
+                if all(word in STOP_WORDS for word in window):
+                    continue
+                phrase = " ".join(window)
+                if len(phrase) > MIN_PHRASE_LENGTH:
+                    yield phrase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match job description phrases against a resume folder")
+    parser.add_argument("job_description")
+    parser.add_argument("resumes", help="directory of resume files")
+    parser.add_argument("-n", type=int, nargs="+", default=[2, 3], help="n-gram sizes (default: 2 3)")
+    parser.add_argument("-k", "--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    extractor = NGramExtractor(args.n)
+    job = extractor.phrase_set(read_text(args.job_description))
+
+    start = time.perf_counter()
+    corpus = [(path, extractor.phrase_set(read_text(path))) for path in iter_resume_files(args.resumes)]
+    elapsed = time.perf_counter() - start
+
+    ranked = sorted(corpus, key=lambda item: (-job.coverage(item[1]), item[0]))[:args.top]
+    for rank, (path, phrases) in enumerate(ranked, 1):
+        print(f"{rank:>4}. {job.coverage(phrases):5.1f}%  {path}")
+
+    total = sum(len(phrases) for _, phrases in corpus)
+    nbytes = sum(phrases.nbytes for _, phrases in corpus)
+    print(
+        f"{len(corpus)} resumes, {total} phrases in {nbytes / 1e6:.1f} MB, "
+        f"extracted in {elapsed:.1f}s",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
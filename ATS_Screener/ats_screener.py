@@ -7,14 +7,114 @@ A single-file application to screen resumes against job descriptions using keywo
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, ttk
 import re
+import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 
-class ATSScreener:
+# Common stop words to ignore
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
+    'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'should', 'could', 'may', 'might', 'must', 'can', 'this', 'that',
+    'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
+    'what', 'which', 'who', 'when', 'where', 'why', 'how', 'all', 'each',
+    'every', 'both', 'few', 'more', 'most', 'other', 'some', 'such', 'no',
+    'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very'
+})
+
+# Quiet period after the last keystroke before live scoring starts
+LIVE_DELAY_MS = 300
+
+# How often the window checks whether background scoring has finished
+POLL_MS = 20
+
+# Status line shown when no scoring is in progress
+IDLE_STATUS = "Scores update as you type."
+
+
+class ATSMatcher:
+    """Keyword extraction and scoring, usable without a window."""
+    
+    def extract_keywords(self, text):
+        """Extract meaningful keywords from text."""
+        # Convert to lowercase
+        text = text.lower()
+        
+        # Remove special characters but keep spaces
+        text = re.sub(r'[^a-z0-9\s+#]', ' ', text)
+        
+        stop_words = STOP_WORDS
+        
+        # Extract words (including compound terms like "machine learning")
+        words = text.split()
+        
+        # Filter out stop words and short words
+        keywords = []
+        for word in words:
+            if len(word) > 2 and word not in stop_words:
+                keywords.append(word)
+        
+        # Also look for multi-word phrases (bigrams)
+        phrases = []
+        for i in range(len(words) - 1):
+            if words[i] not in stop_words or words[i+1] not in stop_words:
+                phrase = f"{words[i]} {words[i+1]}"
+                if len(phrase) > 5:  # Reasonable phrase length
+                    phrases.append(phrase)
+        
+        return keywords, phrases
+    
+    def calculate_match_score(self, jd_keywords, resume_keywords, jd_phrases, resume_phrases):
+        """Calculate matching score between job description and resume."""
+        # Convert to sets for comparison
+        jd_kw_set = set(jd_keywords)
+        resume_kw_set = set(resume_keywords)
+        jd_ph_set = set(jd_phrases)
+        resume_ph_set = set(resume_phrases)
+        
+        # Find matches
+        matched_keywords = jd_kw_set.intersection(resume_kw_set)
+        matched_phrases = jd_ph_set.intersection(resume_ph_set)
+        
+        # Calculate scores
+        keyword_score = (len(matched_keywords) / len(jd_kw_set) * 100) if jd_kw_set else 0
+        phrase_score = (len(matched_phrases) / len(jd_ph_set) * 100) if jd_ph_set else 0
+        
+        # Overall score (weighted average)
+        overall_score = (keyword_score * 0.7 + phrase_score * 0.3)
+        
+        # Find missing keywords
+        missing_keywords = jd_kw_set - resume_kw_set
+        
+        return {
+            'overall_score': overall_score,
+            'keyword_score': keyword_score,
+            'phrase_score': phrase_score,
+            'matched_keywords': matched_keywords,
+            'matched_phrases': matched_phrases,
+            'missing_keywords': missing_keywords,
+            'total_jd_keywords': len(jd_kw_set),
+            'total_resume_keywords': len(resume_kw_set)
+        }
+
+
+class ATSScreener(ATSMatcher):
     def __init__(self):
         self.window = tk.Tk()
         self.window.title("ATS Resume Screener")
         self.window.geometry("900x700")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        # Live scoring state: one worker thread, a pending debounce timer and
+        # a generation number that makes older computations stale
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.generation = 0
+        self.debounce_id = None
+        self.future = None
+        self.feature_cache = {}
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -47,6 +147,7 @@ class ATSScreener:
             wrap=tk.WORD
         )
         self.jd_text.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.jd_text.bind("<<Modified>>", self.on_text_modified)
         
         # Resume Section
         resume_label = tk.Label(
@@ -64,6 +165,7 @@ class ATSScreener:
             wrap=tk.WORD
         )
         self.resume_text.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.resume_text.bind("<<Modified>>", self.on_text_modified)
         
         # Button Frame
         button_frame = tk.Frame(main_frame)
@@ -95,6 +197,15 @@ class ATSScreener:
         )
         clear_btn.pack(side=tk.LEFT, padx=5)
         
+        # Live scoring status
+        self.status_label = tk.Label(
+            main_frame,
+            text=IDLE_STATUS,
+            font=("Arial", 9),
+            fg="gray"
+        )
+        self.status_label.pack(anchor=tk.W)
+        
         # Results Section
         results_label = tk.Label(
             main_frame,
@@ -113,78 +224,6 @@ class ATSScreener:
         )
         self.results_text.pack(fill=tk.BOTH, expand=True)
     
-    def extract_keywords(self, text):
-        """Extract meaningful keywords from text."""
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters but keep spaces
-        text = re.sub(r'[^a-z0-9\s+#]', ' ', text)
-        
-        # Common stop words to ignore
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been',
-            'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-            'should', 'could', 'may', 'might', 'must', 'can', 'this', 'that',
-            'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
-            'what', 'which', 'who', 'when', 'where', 'why', 'how', 'all', 'each',
-            'every', 'both', 'few', 'more', 'most', 'other', 'some', 'such', 'no',
-            'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very'
-        }
-        
-        # Extract words (including compound terms like "machine learning")
-        words = text.split()
-        
-        # Filter out stop words and short words
-        keywords = []
-        for word in words:
-            if len(word) > 2 and word not in stop_words:
-                keywords.append(word)
-        
-        # Also look for multi-word phrases (bigrams)
-        phrases = []
-        for i in range(len(words) - 1):
-            if words[i] not in stop_words or words[i+1] not in stop_words:
-                phrase = f"{words[i]} {words[i+1]}"
-                if len(phrase) > 5:  # Reasonable phrase length
-                    phrases.append(phrase)
-        
-        return keywords, phrases
-    
-    def calculate_match_score(self, jd_keywords, resume_keywords, jd_phrases, resume_phrases):
-        """Calculate matching score between job description and resume."""
-        # Convert to sets for comparison
-        jd_kw_set = set(jd_keywords)
-        resume_kw_set = set(resume_keywords)
-        jd_ph_set = set(jd_phrases)
-        resume_ph_set = set(resume_phrases)
-        
-        # Find matches
-        matched_keywords = jd_kw_set.intersection(resume_kw_set)
-        matched_phrases = jd_ph_set.intersection(resume_ph_set)
-        
-        # Calculate scores
-        keyword_score = (len(matched_keywords) / len(jd_kw_set) * 100) if jd_kw_set else 0
-        phrase_score = (len(matched_phrases) / len(jd_ph_set) * 100) if jd_ph_set else 0
-        
-        # Overall score (weighted average)
-        overall_score = (keyword_score * 0.7 + phrase_score * 0.3)
-        
-        # Find missing keywords
-        missing_keywords = jd_kw_set - resume_kw_set
-        
-        return {
-            'overall_score': overall_score,
-            'keyword_score': keyword_score,
-            'phrase_score': phrase_score,
-            'matched_keywords': matched_keywords,
-            'matched_phrases': matched_phrases,
-            'missing_keywords': missing_keywords,
-            'total_jd_keywords': len(jd_kw_set),
-            'total_resume_keywords': len(resume_kw_set)
-        }
-    
     def analyze_match(self):
         """Analyze the match between job description and resume."""
         jd_content = self.jd_text.get("1.0", tk.END).strip()
@@ -197,18 +236,76 @@ class ATSScreener:
             )
             return
         
-        # Extract keywords and phrases
-        jd_keywords, jd_phrases = self.extract_keywords(jd_content)
-        resume_keywords, resume_phrases = self.extract_keywords(resume_content)
-        
-        # Calculate match
+        self.start_scoring(jd_content, resume_content)
+    
+    def on_text_modified(self, event):
+        """Restart the debounce timer after every edit."""
+        # Reset the flag, or Tk will not report the next modification
+        event.widget.edit_modified(False)
+        if self.debounce_id is not None:
+            self.window.after_cancel(self.debounce_id)
+        self.debounce_id = self.window.after(LIVE_DELAY_MS, self.live_score)
+    
+    def live_score(self):
+        """Score the current text once typing has paused."""
+        self.debounce_id = None
+        jd_content = self.jd_text.get("1.0", tk.END).strip()
+        resume_content = self.resume_text.get("1.0", tk.END).strip()
+        if jd_content and resume_content:
+            self.start_scoring(jd_content, resume_content)
+    
+    def start_scoring(self, jd_content, resume_content):
+        """Score in the background; any older computation becomes stale."""
+        self.generation += 1
+        if self.future is not None:
+            # Drops it if it has not started; a running one stops at its next check
+            self.future.cancel()
+        self.future = self.executor.submit(
+            self.score_texts, self.generation, jd_content, resume_content
+        )
+        self.status_label.config(text="Scoring...")
+        self.window.after(POLL_MS, self.poll_scoring, self.future)
+    
+    def features(self, side, text):
+        """Keywords and phrases of one side, recomputed only when its text changed."""
+        cached = self.feature_cache.get(side)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        features = self.extract_keywords(text)
+        self.feature_cache[side] = (text, features)
+        return features
+    
+    def score_texts(self, generation, jd_content, resume_content):
+        """Worker thread: return (results, seconds), or None once stale."""
+        start = time.perf_counter()
+        jd_keywords, jd_phrases = self.features("jd", jd_content)
+        if generation != self.generation:
+            return None
+        resume_keywords, resume_phrases = self.features("resume", resume_content)
+        if generation != self.generation:
+            return None
         results = self.calculate_match_score(
             jd_keywords, resume_keywords,
             jd_phrases, resume_phrases
         )
-        
-        # Display results
+        return results, time.perf_counter() - start
+    
+    def poll_scoring(self, future):
+        """Main thread: show the result of future once it is done."""
+        if future is not self.future:
+            return
+        if not future.done():
+            self.window.after(POLL_MS, self.poll_scoring, future)
+            return
+        self.future = None
+        outcome = None if future.cancelled() else future.result()
+        if outcome is None:
+            # Stale or cancelled, with no newer computation to report
+            self.status_label.config(text=IDLE_STATUS)
+            return
+        results, elapsed = outcome
         self.display_results(results)
+        self.status_label.config(text=f"Scored in {elapsed * 1000:.0f} ms")
     
     def display_results(self, results):
         """Display analysis results."""
@@ -272,12 +369,25 @@ Recommendations:
     
     def clear_all(self):
         """Clear all text fields."""
+        self.generation += 1
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+        self.status_label.config(text=IDLE_STATUS)
         self.jd_text.delete("1.0", tk.END)
         self.resume_text.delete("1.0", tk.END)
         self.results_text.config(state=tk.NORMAL)
         self.results_text.delete("1.0", tk.END)
         self.results_text.config(state=tk.DISABLED)
     
+    def close(self):
+        """Stop background scoring and close the window."""
+        self.generation += 1
+        if self.debounce_id is not None:
+            self.window.after_cancel(self.debounce_id)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.window.destroy()
+    
     def run(self):
         """Run the application."""
         self.window.mainloop()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+ATS Vector Scoring
+BM25 and TF-IDF ranking of a resume corpus with NumPy sparse vectors.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from ats_batch import iter_resume_files, rank_resumes, read_text, write_results
+from ats_screener import ATSMatcher
+
+# scipy is optional; without it matrix-vector products use np.bincount
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+METHODS = ("keyword", "bm25", "tfidf")
+
+
+class ResumeMatrix:
+    """Resumes as sparse term-frequency rows over a shared vocabulary.
+
+    Terms are the keywords and bigram phrases from extract_keywords. Weighted
+    copies of the matrix are built once per method, so every job description
+    is scored against the whole corpus with one sparse matrix-vector product.
+    """
+
+    def __init__(self, matcher=None, k1=1.5, b=0.75):
+        self.matcher = matcher or ATSMatcher()
+        self.k1 = k1
+        self.b = b
+        self.names = []
+        self.vocabulary = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.tf = np.zeros(0, dtype=np.float64)
+        self._weights = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def terms(self, text):
+        """Return the keyword and phrase list of a text."""
+        keywords, phrases = self.matcher.extract_keywords(text)
+        return keywords + phrases
+
+    def build(self, items):
+        """Index (name, text) pairs, replacing any previous corpus."""
+        vocabulary = {}
+        names = []
+        indices = []
+        counts = []
+        indptr = [0]
+        for name, text in items:
+            term_counts = Counter(self.terms(text))
+            for term in term_counts:
+                if term not in vocabulary:
+                    vocabulary[term] = len(vocabulary)
+            indices.extend(vocabulary[term] for term in term_counts)
+            counts.extend(term_counts.values())
+            indptr.append(len(indices))
+            names.append(name)
+
+        self.names = names
+        self.vocabulary = vocabulary
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.tf = np.array(counts, dtype=np.float64)
+        self._weights = {}
+        return self
+
+    def _rows(self):
+        """Row number of every stored entry."""
+        return np.repeat(np.arange(len(self.names)), np.diff(self.indptr))
+
+    def _document_frequency(self):
+        return np.bincount(self.indices, minlength=len(self.vocabulary)).astype(np.float64)
+
+    def _bm25_weights(self):
+        count = len(self.names)
+        df = self._document_frequency()
+        idf = np.log1p((count - df + 0.5) / (df + 0.5))
+        lengths = np.bincount(self._rows(), weights=self.tf, minlength=count)
+        average = lengths.mean() if count else 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / (average or 1.0))
+        tf = self.tf
+        return idf[self.indices] * tf * (self.k1 + 1) / (tf + norm[self._rows()]), idf
+
+    def _tfidf_weights(self):
+        count = len(self.names)
+        df = self._document_frequency()
+        idf = np.log((1 + count) / (1 + df)) + 1
+        weights = self.tf * idf[self.indices]
+        norms = np.sqrt(np.bincount(self._rows(), weights=weights ** 2, minlength=count))
+        norms[norms == 0] = 1.0
+        return weights / norms[self._rows()], idf
+
+    def _weighted(self, method):
+        """Return (matrix or entry weights, idf) for a method, built once."""
+        if method not in self._weights:
+            weights, idf = self._bm25_weights() if method == "bm25" else self._tfidf_weights()
+            if SCIPY_AVAILABLE:
+                weights = sparse.csr_matrix(
+                    (weights, self.indices, self.indptr),
+                    shape=(len(self.names), len(self.vocabulary))
+                )
+            self._weights[method] = (weights, idf)
+        return self._weights[method]
+
+    def query_vector(self, job_text, method, idf):
+        """Dense query vector over the vocabulary."""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float64)
+        counts = Counter(term for term in self.terms(job_text) if term in self.vocabulary)
+        if not counts:
+            return vector
+        positions = np.fromiter((self.vocabulary[term] for term in counts), dtype=np.int64)
+        if method == "bm25":
+            vector[positions] = 1.0
+        else:
+            vector[positions] = np.fromiter(counts.values(), dtype=np.float64) * idf[positions]
+            vector /= np.linalg.norm(vector)
+        return vector
+
+    def score(self, job_text, method="bm25"):
+        """Score every resume against a job description in one product."""
+        if method not in ("bm25", "tfidf"):
+            raise ValueError(f"unknown method {method!r}")
+        weights, idf = self._weighted(method)
+        vector = self.query_vector(job_text, method, idf)
+        if SCIPY_AVAILABLE:
+            return weights @ vector
+        return np.bincount(
+            self._rows(),
+            weights=weights * vector[self.indices],
+            minlength=len(self.names)
+        )
+
+    def rank(self, job_text, top_k=20, method="bm25", text_of=None):
+        """Return the top k (name, summary) pairs, best first.
+
+        Summaries carry the method's score. Given text_of, a function from
+        name to resume text, the top k also get the 70/30 keyword scores
+        for side-by-side comparison. Resumes sharing no term with the job
+        description score zero and are left out, as in ResumeIndex.query.
+        """
+        scores = self.score(job_text, method)
+        matching = np.flatnonzero(scores > 0)
+        k = min(top_k, len(matching))
+        if k <= 0:
+            return []
+        top = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+        top = top[np.lexsort((top, -scores[top]))]
+
+        job = None
+        if text_of is not None:
+            keywords, phrases = self.matcher.extract_keywords(job_text)
+            job = (set(keywords), set(phrases))
+
+        ranked = []
+        for row in top:
+            name = self.names[row]
+            summary = {"score": float(scores[row])}
+            if job is not None:
+                resume_keywords, resume_phrases = self.matcher.extract_keywords(text_of(name))
+                result = self.matcher.calculate_match_score(job[0], resume_keywords, job[1], resume_phrases)
+                summary.update(
+                    overall_score=result["overall_score"],
+                    keyword_score=result["keyword_score"],
+                    phrase_score=result["phrase_score"]
+                )
+            ranked.append((name, summary))
+        return ranked
+
+
+def compare(job_text, paths, top_k, stream=sys.stdout):
+    """Rank with every method and print timings and top-k overlap."""
+    paths = list(paths)
+    start = time.perf_counter()
+    keyword_ranked, _ = rank_resumes(job_text, iter(paths), top_k)
+    keyword_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = ResumeMatrix().build((path, read_text(path)) for path in paths)
+    build_time = time.perf_counter() - start
+
+    keyword_top = {name for name, _ in keyword_ranked}
+    stream.write(f"{'method':<10}{'build s':>10}{'query ms':>10}{'overlap@k':>11}\n")
+    stream.write(f"{'keyword':<10}{'-':>10}{keyword_time * 1000:>10.1f}{1.0:>11.2f}\n")
+    for method in ("bm25", "tfidf"):
+        matrix.rank(job_text, top_k, method)  # builds the weighted matrix
+        start = time.perf_counter()
+        ranked = matrix.rank(job_text, top_k, method)
+        query_time = time.perf_counter() - start
+        overlap = len(keyword_top & {name for name, _ in ranked}) / max(len(keyword_top), 1)
+        stream.write(f"{method:<10}{build_time:>10.2f}{query_time * 1000:>10.1f}{overlap:>11.2f}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank resumes with BM25, TF-IDF or keyword scores")
+    parser.add_argument("job_description")
+    parser.add_argument("resumes", help="directory of resume files")
+    parser.add_argument("-k", "--top", type=int, default=20)
+    parser.add_argument("-m", "--method", choices=METHODS, default="bm25")
+    parser.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+    parser.add_argument("--compare", action="store_true", help="time every method and compare their top k")
+    args = parser.parse_args(argv)
+
+    job_text = read_text(args.job_description)
+    if args.compare:
+        compare(job_text, iter_resume_files(args.resumes), args.top)
+        return
+    if args.method == "keyword":
+        ranked, _ = rank_resumes(job_text, iter_resume_files(args.resumes), args.top)
+    else:
+        matrix = ResumeMatrix().build(
+            (path, read_text(path)) for path in iter_resume_files(args.resumes)
+        )
+        ranked = matrix.rank(job_text, args.top, args.method, text_of=read_text)
+    write_results(ranked, sys.stdout, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Spam Email Batch Scorer
+Headless bulk classification of mbox files, Maildir folders and JSONL dumps
+"""
+
+import argparse
+import csv
+import json
+import mailbox
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from spam_email import SpamClassifier
+
+# Classifier shared by every task that runs inside one worker process
+_worker_classifier = None
+
+
+def _init_worker(classifier, model_path=None):
+    """Install the trained classifier once per worker process
+
+    Given a model path, each worker memory-maps the snapshot itself so all
+    workers share one copy of the count arrays through the page cache.
+    """
+    global _worker_classifier
+    _worker_classifier = classifier if classifier is not None else SpamClassifier(model_path)
+
+
+def _score_chunk(chunk):
+    """Score a list of (id, payload) pairs inside a worker"""
+    classifier = _worker_classifier
+    # Raw bytes go through the MIME-aware tokenizer, so attachments are skipped
+    documents = [classifier.preprocess(payload) for _, payload in chunk]
+    probabilities = classifier.spam_probabilities(documents)
+    return [
+        (msg_id, "SPAM" if probability > 0.5 else "HAM", float(probability))
+        for (msg_id, _), probability in zip(chunk, probabilities)
+    ]
+
+
+def iter_mbox(path):
+    """Yield (id, raw bytes) from an mbox file one message at a time"""
+    box = mailbox.mbox(path, create=False)
+    try:
+        for key in box.iterkeys():
+            yield f"{path}:{key}", box.get_bytes(key)
+    finally:
+        box.close()
+
+
+def iter_maildir(path):
+    """Yield (id, raw bytes) from a Maildir directory one message at a time"""
+    box = mailbox.Maildir(path, factory=None, create=False)
+    for key in box.iterkeys():
+        try:
+            yield key, box.get_bytes(key)
+        except KeyError:
+            # Message was moved or deleted while we were scanning
+            continue
+
+
+def iter_jsonl(path):
+    """Yield (id, text) from a JSONL file with "id" and "text" fields"""
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield str(record.get("id", f"{path}:{line_number}")), record["text"]
+
+
+def detect_format(path):
+    """Guess the input format of a path"""
+    if os.path.isdir(path):
+        return "maildir"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "mbox"
+
+
+def iter_messages(paths, input_format="auto"):
+    """Stream messages from every input path"""
+    readers = {"mbox": iter_mbox, "maildir": iter_maildir, "jsonl": iter_jsonl}
+    for path in paths:
+        fmt = detect_format(path) if input_format == "auto" else input_format
+        yield from readers[fmt](path)
+
+
+def iter_chunks(messages, chunk_size):
+    """Group a message stream into lists of chunk_size"""
+    chunk = []
+    for item in messages:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_messages(messages, classifier=None, workers=None, chunk_size=256,
+                   max_pending=None, model_path=None):
+    """Score a message stream on a process pool, yielding results in order
+
+    Pass either a trained classifier or the path of a saved model. At most
+    max_pending chunks are in flight, so memory stays bounded no matter how
+    large the input is.
+    """
+    if classifier is None and model_path is None:
+        raise ValueError("Either classifier or model_path is required")
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(classifier, model_path)
+    ) as executor:
+        pending = deque()
+        for chunk in iter_chunks(messages, chunk_size):
+            pending.append(executor.submit(_score_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class ResultWriter:
+    """Streams (id, label, probability) rows as CSV or JSONL"""
+
+    def __init__(self, handle, output_format="csv"):
+        self.handle = handle
+        self.output_format = output_format
+        if output_format == "csv":
+            self.writer = csv.writer(handle)
+            self.writer.writerow(["id", "label", "probability"])
+
+    def write(self, msg_id, label, probability):
+        if self.output_format == "csv":
+            self.writer.writerow([msg_id, label, f"{probability:.6f}"])
+        else:
+            self.handle.write(json.dumps(
+                {"id": msg_id, "label": label, "probability": probability}
+            ) + "\n")
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Bulk-score emails as spam or ham")
+    parser.add_argument("inputs", nargs="+", help="mbox files, Maildir directories or JSONL files")
+    parser.add_argument("--input-format", choices=["auto", "mbox", "maildir", "jsonl"], default="auto")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="messages per task")
+    parser.add_argument("-m", "--model", help="saved model snapshot (default: built-in pre-trained model)")
+    args = parser.parse_args(argv)
+
+    if args.model and not os.path.exists(args.model):
+        parser.error(f"model not found: {args.model}")
+    classifier = None if args.model else SpamClassifier()
+
+    handle = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = ResultWriter(handle, args.output_format)
+        start = time.perf_counter()
+        count = 0
+        messages = iter_messages(args.inputs, args.input_format)
+        for msg_id, label, probability in score_messages(
+            messages, classifier, args.workers, args.chunk_size, model_path=args.model
+        ):
+            writer.write(msg_id, label, probability)
+            count += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {count} messages in {elapsed:.1f}s ({rate:.0f} msg/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Spam Email Benchmarks
+Headless throughput and memory measurements for spam_email.py
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import string
+import sys
+import time
+import tracemalloc
+from email.message import EmailMessage
+
+from spam_email import SpamClassifier, tokenize
+
+WORDS = [
+    "meeting", "project", "report", "schedule", "review", "invoice", "offer",
+    "money", "prize", "winner", "click", "account", "verify", "urgent",
+    "discount", "pharmacy", "lottery", "coffee", "friday", "attached"
+]
+
+
+def legacy_preprocess(text):
+    """The original SpamClassifier.preprocess, kept as a baseline"""
+    text = text.lower()
+    text = re.sub(f'[{re.escape(string.punctuation)}]', ' ', text)
+    words = text.split()
+    return [w for w in words if len(w) > 2]
+
+
+def synthetic_text(size, rng):
+    """Return roughly size characters of punctuated prose"""
+    pieces = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.1:
+            word += rng.choice(".,!?")
+        pieces.append(word)
+        length += len(word) + 1
+    return " ".join(pieces)
+
+
+def synthetic_html(size, rng):
+    """Return roughly size characters of tag-heavy HTML"""
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = f'<p style="color:#333"><b>{synthetic_text(200, rng)}</b></p>'
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+    return "<html><body>" + "".join(paragraphs) + "</body></html>"
+
+
+def synthetic_mime(size, rng):
+    """Return a raw message with a short body and a size-byte attachment"""
+    message = EmailMessage()
+    message["Subject"] = "Quarterly report"
+    message["From"] = "alice@example.com"
+    message.set_content(synthetic_text(2000, rng))
+    message.add_attachment(
+        rng.randbytes(size), maintype="application", subtype="pdf", filename="report.pdf"
+    )
+    return message.as_string()
+
+
+def measure(function, text, repeat):
+    """Return (MB/s, peak traced bytes, token count) for function on text"""
+    tokens = len(list(function(text)))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _ in function(text):
+            pass
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in function(text):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    megabytes = len(text) * repeat / 1e6
+    return megabytes / elapsed, peak, tokens
+
+
+def benchmark_tokenizer(size, repeat, seed):
+    """Compare the legacy preprocess with the streaming tokenizer"""
+    rng = random.Random(seed)
+    inputs = [
+        ("plain text", synthetic_text(size, rng)),
+        ("html", synthetic_html(size, rng)),
+        ("mime + attachment", synthetic_mime(size, rng))
+    ]
+    tokenizers = [
+        ("legacy", legacy_preprocess),
+        ("preprocess", SpamClassifier().preprocess),
+        ("tokenize", tokenize)
+    ]
+    print(f"{'input':<20}{'tokenizer':<12}{'MB/s':>10}{'peak MB':>10}{'tokens':>10}")
+    for name, text in inputs:
+        for label, function in tokenizers:
+            rate, peak, tokens = measure(function, text, repeat)
+            print(f"{name:<20}{label:<12}{rate:>10.1f}{peak / 1e6:>10.1f}{tokens:>10}")
+
+
+def synthetic_corpus(count, length, vocabulary_size, seed=0, spam_ratio=0.5):
+    """Return (texts, labels) drawn from two overlapping Zipf distributions
+
+    Spam and ham share one vocabulary but each boosts a different random
+    seventh of it, so accuracy is high but not trivially perfect.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"tok{i}" for i in range(vocabulary_size)]
+    base = [1.0 / (rank + 1) for rank in range(vocabulary_size)]
+    spam_weights = list(base)
+    ham_weights = list(base)
+    for index in rng.sample(range(vocabulary_size), vocabulary_size // 7):
+        spam_weights[index] *= 3
+    for index in rng.sample(range(vocabulary_size), vocabulary_size // 7):
+        ham_weights[index] *= 3
+    spam_cumulative = list(itertools.accumulate(spam_weights))
+    ham_cumulative = list(itertools.accumulate(ham_weights))
+
+    texts = []
+    labels = []
+    for _ in range(count):
+        is_spam = rng.random() < spam_ratio
+        cumulative = spam_cumulative if is_spam else ham_cumulative
+        words = rng.choices(vocabulary, cum_weights=cumulative, k=length)
+        texts.append(" ".join(words) + ".")
+        labels.append(is_spam)
+    return texts, labels
+
+
+def best_time(function, repeat):
+    """Return the fastest of repeat timed runs of function"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function):
+    """Return the peak traced allocation in bytes while function runs"""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark_config(corpus_size, length, vocabulary_size, repeat=3, seed=0,
+                     hash_size=None, max_vocabulary=None):
+    """Measure preprocess, train and classify on one synthetic corpus
+
+    hash_size and max_vocabulary are passed to SpamClassifier, to compare
+    bounded models with the full one.
+    """
+    # Train and test sets come from one corpus so they share a distribution
+    test_size = max(corpus_size // 5, 100)
+    all_texts, all_labels = synthetic_corpus(corpus_size + test_size, length, vocabulary_size, seed)
+    texts, labels = all_texts[:corpus_size], all_labels[:corpus_size]
+    test_texts, test_labels = all_texts[corpus_size:], all_labels[corpus_size:]
+    megabytes = sum(len(text) for text in texts) / 1e6
+
+    def train():
+        classifier = SpamClassifier(hash_size=hash_size, max_vocabulary=max_vocabulary)
+        classifier.train_batch(texts, labels)
+        return classifier
+
+    preprocess = SpamClassifier().preprocess
+    preprocess_time = best_time(lambda: [preprocess(text) for text in texts], repeat)
+    train_time = best_time(train, repeat)
+    train_peak = peak_memory(train)
+
+    classifier = train()
+    classify_time = best_time(lambda: classifier.classify_batch(test_texts), repeat)
+    single = test_texts[:200]
+    single_time = best_time(lambda: [classifier.classify(text) for text in single], repeat)
+
+    predictions = classifier.classify_batch(test_texts)
+    correct = sum((label == "SPAM") == is_spam for (label, _), is_spam in zip(predictions, test_labels))
+
+    return {
+        "corpus_size": corpus_size,
+        "length": length,
+        "vocabulary_size": vocabulary_size,
+        "hash_size": hash_size,
+        "max_vocabulary": max_vocabulary,
+        "preprocess_mb_per_s": megabytes / preprocess_time,
+        "train_emails_per_s": corpus_size / train_time,
+        "classify_emails_per_s": len(test_texts) / classify_time,
+        "classify_one_us": single_time / len(single) * 1e6,
+        "train_peak_mb": train_peak / 1e6,
+        "model_tokens": len(classifier.model),
+        "accuracy": correct / len(test_texts)
+    }
+
+
+def print_results(results):
+    """Print benchmark results as a table"""
+    columns = [
+        ("corpus_size", "emails", 8, "d"),
+        ("length", "tokens", 8, "d"),
+        ("vocabulary_size", "vocab", 8, "d"),
+        ("preprocess_mb_per_s", "prep MB/s", 11, ".1f"),
+        ("train_emails_per_s", "train/s", 10, ".0f"),
+        ("classify_emails_per_s", "batch/s", 10, ".0f"),
+        ("classify_one_us", "one us", 9, ".1f"),
+        ("train_peak_mb", "peak MB", 9, ".1f"),
+        ("model_tokens", "model", 9, "d"),
+        ("accuracy", "accuracy", 10, ".3f")
+    ]
+    print("".join(f"{title:>{width}}" for _, title, width, _ in columns))
+    for result in results:
+        print("".join(f"{result[key]:>{width}{spec}}" for key, _, width, spec in columns))
+
+
+def parse_sizes(value):
+    """Parse a comma-separated list of integers"""
+    return [int(part) for part in value.split(",") if part]
+
+
+def run_sweep(corpus_sizes, lengths, vocabulary_sizes, repeat, seed, hash_size=None, max_vocabulary=None):
+    """Benchmark every combination of the given sizes"""
+    results = []
+    for corpus_size, length, vocabulary_size in itertools.product(
+        corpus_sizes, lengths, vocabulary_sizes
+    ):
+        results.append(benchmark_config(
+            corpus_size, length, vocabulary_size, repeat, seed, hash_size, max_vocabulary
+        ))
+        print(f"  done {corpus_size} x {length} tokens, vocabulary {vocabulary_size}",
+              file=sys.stderr)
+    return results
+
+
+# Fixed configurations used by regression mode
+REGRESSION_CONFIGS = [
+    (2000, 50, 5000),
+    (2000, 500, 5000),
+    (5000, 100, 50000)
+]
+
+# Metrics where bigger is better and a drop beyond the threshold fails
+THROUGHPUT_METRICS = ["preprocess_mb_per_s", "train_emails_per_s", "classify_emails_per_s"]
+
+
+def check_regression(baseline, current, threshold, accuracy_tolerance):
+    """Return a list of human-readable regressions of current vs baseline"""
+    def key(result):
+        return result["corpus_size"], result["length"], result["vocabulary_size"]
+
+    baseline = {key(result): result for result in baseline}
+    failures = []
+    for new in current:
+        config = f"{new['corpus_size']}x{new['length']}/{new['vocabulary_size']}"
+        old = baseline.get(key(new))
+        if old is None:
+            failures.append(f"{config}: not in the baseline; record one with --update")
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if new[metric] < old[metric] * (1 - threshold):
+                failures.append(
+                    f"{config} {metric}: {new[metric]:.1f} vs baseline {old[metric]:.1f}"
+                )
+        if new["accuracy"] < old["accuracy"] - accuracy_tolerance:
+            failures.append(
+                f"{config} accuracy: {new['accuracy']:.3f} vs baseline {old['accuracy']:.3f}"
+            )
+    return failures
+
+
+def run_regression(baseline_path, update, threshold, accuracy_tolerance, repeat, seed):
+    """Compare the fixed configurations with a saved baseline; return exit code"""
+    results = [
+        benchmark_config(corpus_size, length, vocabulary_size, repeat, seed)
+        for corpus_size, length, vocabulary_size in REGRESSION_CONFIGS
+    ]
+    print_results(results)
+
+    if update:
+        with open(baseline_path, "w", encoding="utf-8") as handle:
+            json.dump({"results": results}, handle, indent=2)
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)["results"]
+    failures = check_regression(baseline, results, threshold, accuracy_tolerance)
+    if failures:
+        print("REGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark spam_email.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    tokenizer = commands.add_parser("tokenizer", help="legacy vs streaming tokenizer throughput")
+    tokenizer.add_argument("--size", type=int, default=4_000_000, help="characters per input")
+    tokenizer.add_argument("--repeat", type=int, default=3)
+    tokenizer.add_argument("--seed", type=int, default=0)
+
+    sweep = commands.add_parser("sweep", help="throughput, memory and accuracy across sizes")
+    sweep.add_argument("--corpus-sizes", type=parse_sizes, default=[1000, 10000])
+    sweep.add_argument("--lengths", type=parse_sizes, default=[50, 500])
+    sweep.add_argument("--vocabulary-sizes", type=parse_sizes, default=[1000, 100000])
+    sweep.add_argument("--repeat", type=int, default=3)
+    sweep.add_argument("--seed", type=int, default=0)
+    sweep.add_argument("--hash-size", type=int, help="hash tokens into this many buckets")
+    sweep.add_argument("--max-vocabulary", type=int, help="prune the vocabulary to this limit")
+    sweep.add_argument("--json", help="also write the results to this file")
+
+    regress = commands.add_parser("regress", help="fail if slower or less accurate than a baseline")
+    regress.add_argument("--baseline", default="spam_benchmark_baseline.json")
+    regress.add_argument("--update", action="store_true", help="record a new baseline instead")
+    regress.add_argument("--threshold", type=float, default=0.2, help="allowed throughput drop (0.2 = 20%%)")
+    regress.add_argument("--accuracy-tolerance", type=float, default=0.01)
+    regress.add_argument("--repeat", type=int, default=3)
+    regress.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "regress" and not args.update and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; record one first with: regress --update")
+    if args.command == "tokenizer":
+        benchmark_tokenizer(args.size, args.repeat, args.seed)
+    elif args.command == "sweep":
+        results = run_sweep(
+            args.corpus_sizes, args.lengths, args.vocabulary_sizes, args.repeat, args.seed,
+            args.hash_size, args.max_vocabulary
+        )
+        print_results(results)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                json.dump({"results": results}, handle, indent=2)
+    else:
+        sys.exit(run_regression(
+            args.baseline, args.update, args.threshold, args.accuracy_tolerance, args.repeat, args.seed
+        ))
+
+
+if __name__ == "__main__":
+    main()
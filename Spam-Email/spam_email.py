@@ -6,22 +6,472 @@ A minimal GUI application for classifying emails as spam or ham
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+import copy
+import email
+import html
+import json
+import math
+import os
 import re
 import string
-from collections import Counter
+import tempfile
+import threading
+import time
+import zlib
 
-class SpamClassifier:
-    """Simple Naive Bayes spam classifier"""
+import numpy as np
+
+# scipy is optional; without it batches are scored with np.bincount
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Model snapshots written next to this script by the GUI
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spam_model.bin")
+
+# Snapshot layout: magic, header length, JSON header, then 64-byte aligned
+# spam counts, ham counts, log ratios and a newline-joined vocabulary
+MODEL_MAGIC = b"SPAMNB01"
+MODEL_ALIGNMENT = 64
+
+# Pruning shrinks an over-full vocabulary to this fraction of its limit, so
+# the next prune is not triggered by the very next email
+PRUNE_TARGET = 0.8
+
+# Runs of characters that are neither whitespace nor ASCII punctuation
+TOKEN_PATTERN = re.compile(f'[^\\s{re.escape(string.punctuation)}]+')
+
+# Turns ASCII punctuation into spaces; str.translate beats re.sub here
+PUNCTUATION_TABLE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+
+# Markup dropped from HTML: script/style bodies, comments and tags. A tag
+# starts with a name, "/" or "!", so a stray "<" in the text is kept.
+HTML_MARKUP_PATTERN = re.compile(
+    r'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[A-Za-z/!][^<>]*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Text is only treated as HTML when it contains a complete common tag
+HTML_HINT_PATTERN = re.compile(
+    r'</?(?:html|body|div|p|br|a|table|span|font|img)(?:\s[^<>]*)?/?>',
+    re.IGNORECASE
+)
+
+# A raw message starts with a header line and declares its MIME structure
+HEADER_LINE_PATTERN = re.compile(r'(?:From |[\w-]+:)')
+MIME_HEADER_PATTERN = re.compile(r'^(?:content-type|mime-version)[ \t]*:', re.IGNORECASE | re.MULTILINE)
+
+# Characters of text lowercased and tokenized at a time
+TOKEN_CHUNK_SIZE = 65536
+
+# Only this much of a text is inspected when sniffing for headers or HTML
+SNIFF_LENGTH = 65536
+
+def iter_token_batches(text):
+    """Lazily yield lists of lowercase tokens longer than two characters
+    
+    The text is consumed in TOKEN_CHUNK_SIZE slices, so memory stays
+    bounded however large it is while tokens are still found at C speed.
+    """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + TOKEN_CHUNK_SIZE
+        if end < length:
+            # Never cut a token in two: extend the slice to the token's end
+            straddling = TOKEN_PATTERN.match(text, end)
+            if straddling:
+                end = straddling.end()
+        words = text[start:end].lower().translate(PUNCTUATION_TABLE).split()
+        yield [w for w in words if len(w) > 2]
+        start = end
+
+def iter_html_text(markup):
+    """Yield the text between HTML tags without building a stripped copy"""
+    position = 0
+    for match in HTML_MARKUP_PATTERN.finditer(markup):
+        if match.start() > position:
+            segment = markup[position:match.start()]
+            yield html.unescape(segment) if "&" in segment else segment
+        position = match.end()
+    segment = markup[position:]
+    yield html.unescape(segment) if "&" in segment else segment
+
+def iter_html_token_batches(markup):
+    """Lazily yield token lists for the visible text of an HTML document"""
+    # Tags are word boundaries, so segments are rejoined with spaces and
+    # tokenized a chunk at a time instead of one tiny segment at a time
+    pending = []
+    pending_length = 0
+    for segment in iter_html_text(markup):
+        pending.append(segment)
+        pending_length += len(segment)
+        if pending_length >= TOKEN_CHUNK_SIZE:
+            yield from iter_token_batches(" ".join(pending))
+            pending = []
+            pending_length = 0
+    if pending:
+        yield from iter_token_batches(" ".join(pending))
+
+def iter_message_token_batches(message):
+    """Yield token lists for a parsed email's subject and text parts
+    
+    Attachments and other non-text parts are skipped without being
+    decoded, and only one text part is held in decoded form at a time.
+    """
+    yield from iter_token_batches(str(message.get("Subject", "")))
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_maintype() != "text":
+            continue
+        payload = part.get_payload(decode=True) or b""
+        charset = part.get_content_charset() or "utf-8"
+        try:
+            text = payload.decode(charset, errors="replace")
+        except LookupError:
+            text = payload.decode("latin-1")
+        del payload
+        if part.get_content_subtype() == "html":
+            yield from iter_html_token_batches(text)
+        else:
+            yield from iter_token_batches(text)
+
+def looks_like_mime(text):
+    """Return True if text is a raw email with MIME headers"""
+    if not HEADER_LINE_PATTERN.match(text):
+        return False
+    header_end = text.find("\n\n", 0, SNIFF_LENGTH)
+    if header_end < 0:
+        header_end = text.find("\r\n\r\n", 0, SNIFF_LENGTH)
+    if header_end < 0:
+        return False
+    return MIME_HEADER_PATTERN.search(text, 0, header_end) is not None
+
+def tokenize_batches(content):
+    """Lazily yield token lists for plain text, HTML or a raw message
     
-    def __init__(self):
-        self.spam_words = Counter()
-        self.ham_words = Counter()
+    Raw messages may be passed as bytes or str; their MIME parts are walked
+    so attachments never turn into tokens. Other bytes are decoded as UTF-8
+    and tokenized exactly like the same str.
+    """
+    if isinstance(content, bytes):
+        # Header bytes are ASCII, so latin-1 sniffs them without decode errors
+        if looks_like_mime(content[:SNIFF_LENGTH].decode("latin-1")):
+            return iter_message_token_batches(email.message_from_bytes(content))
+        content = content.decode("utf-8", errors="replace")
+    if looks_like_mime(content):
+        return iter_message_token_batches(email.message_from_string(content))
+    if HTML_HINT_PATTERN.search(content, 0, SNIFF_LENGTH):
+        return iter_html_token_batches(content)
+    return iter_token_batches(content)
+
+def tokenize(content):
+    """Lazily yield the tokens of plain text, HTML or a raw message"""
+    for batch in tokenize_batches(content):
+        yield from batch
+
+class NaiveBayesModel:
+    """Spam/ham token counts stored as NumPy arrays over a shared vocabulary
+    
+    With hash_size set, tokens are hashed into that many buckets instead of
+    being indexed, so memory stays fixed however many new tokens arrive.
+    """
+    
+    def __init__(self, capacity=1024, hash_size=None):
+        self.hash_size = hash_size
+        if hash_size:
+            capacity = hash_size
+        self._vocabulary = {}
+        
+        # Newline-joined tokens of a loaded snapshot, indexed on first use
+        self._vocabulary_blob = None
+        self.spam_counts = np.zeros(capacity, dtype=np.int64)
+        self.ham_counts = np.zeros(capacity, dtype=np.int64)
+        
+        # log(spam_count + 1) - log(ham_count + 1) for every vocabulary index
+        self.log_ratio = np.zeros(capacity, dtype=np.float64)
+        
+        # Running totals so scoring never has to walk the vocabulary
+        self.spam_total = 0
+        self.ham_total = 0
+        self.spam_distinct = 0
+        self.ham_distinct = 0
         self.spam_count = 0
         self.ham_count = 0
-        self.trained = False
-        
-        # Pre-train with common patterns
-        self._pretrain()
+    
+    def __len__(self):
+        if self.hash_size or self._vocabulary_blob is not None:
+            return len(self.log_ratio)
+        return len(self._vocabulary)
+    
+    @property
+    def vocabulary(self):
+        """Token to index mapping"""
+        if self._vocabulary_blob is not None:
+            tokens = self._vocabulary_blob.decode("utf-8").split("\n")
+            self._vocabulary = dict(zip(tokens, range(len(tokens))))
+            self._vocabulary_blob = None
+        return self._vocabulary
+    
+    def _reserve(self, size):
+        """Grow the count arrays geometrically to hold size tokens"""
+        capacity = len(self.spam_counts)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name in ("spam_counts", "ham_counts", "log_ratio"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def encode(self, documents, grow=False):
+        """Map tokenized documents to flat CSR-style index arrays
+        
+        Returns (indices, indptr, lengths). Unknown tokens are added to the
+        vocabulary when grow is set and dropped otherwise; lengths always
+        counts every token, since unknown words still shift the likelihood.
+        """
+        vocabulary = self.vocabulary
+        lookup = vocabulary.get
+        hash_size = self.hash_size
+        indices = []
+        indptr = [0]
+        lengths = []
+        for words in documents:
+            if hash_size:
+                # crc32 is stable across processes, unlike the built-in hash()
+                indices.extend([zlib.crc32(w.encode("utf-8")) % hash_size for w in words])
+            elif grow:
+                new_words = set(words).difference(vocabulary)
+                if new_words:
+                    start = len(vocabulary)
+                    vocabulary.update(zip(new_words, range(start, start + len(new_words))))
+                indices.extend(map(vocabulary.__getitem__, words))
+            else:
+                indices.extend([i for i in map(lookup, words) if i is not None])
+            indptr.append(len(indices))
+            lengths.append(len(words))
+        if grow and not hash_size:
+            self._reserve(len(vocabulary))
+        return (
+            np.array(indices, dtype=np.int64),
+            np.array(indptr, dtype=np.int64),
+            np.array(lengths, dtype=np.int64)
+        )
+    
+    def copy(self):
+        """Return an independent copy that can be trained without touching this one"""
+        clone = copy.copy(self)
+        clone._vocabulary = dict(self.vocabulary)
+        clone._vocabulary_blob = None
+        clone.spam_counts = np.array(self.spam_counts)
+        clone.ham_counts = np.array(self.ham_counts)
+        clone.log_ratio = np.array(self.log_ratio)
+        return clone
+    
+    def prune(self, min_count=2, max_size=None):
+        """Drop rare tokens from the vocabulary and return how many went
+        
+        Without max_size, tokens seen fewer than min_count times are removed.
+        With max_size, the max_size most frequent tokens are kept (ties go to
+        the earlier token), so min_count only cuts when enough tokens pass it
+        to fill the cap. Totals are reduced to match, so the model stays a
+        consistent Naive Bayes model.
+        """
+        if self.hash_size:
+            raise ValueError("Hashed models have a fixed size and are never pruned")
+        
+        size = len(self)
+        frequency = self.spam_counts[:size] + self.ham_counts[:size]
+        if max_size is None:
+            keep = frequency >= min_count
+        else:
+            keep = np.zeros(size, dtype=bool)
+            keep[np.argsort(-frequency, kind="stable")[:max_size]] = True
+        removed = size - int(np.count_nonzero(keep))
+        if not removed:
+            return 0
+        
+        tokens = self.tokens()
+        kept = np.flatnonzero(keep)
+        
+        self.spam_total -= int(self.spam_counts[:size][~keep].sum())
+        self.ham_total -= int(self.ham_counts[:size][~keep].sum())
+        self._vocabulary = {tokens[index]: position for position, index in enumerate(kept)}
+        
+        # Fresh arrays, so a pruned copy never shares memory with its source
+        capacity = max(len(kept), 1024)
+        for name in ("spam_counts", "ham_counts", "log_ratio"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(kept)] = old[kept]
+            setattr(self, name, new)
+        self.spam_distinct = int(np.count_nonzero(self.spam_counts))
+        self.ham_distinct = int(np.count_nonzero(self.ham_counts))
+        return removed
+    
+    def document_term_matrix(self, indices, indptr):
+        """Build a scipy.sparse CSR document-term matrix from encoded documents"""
+        data = np.ones(len(indices), dtype=np.float64)
+        matrix = sparse.csr_matrix(
+            (data, indices, indptr),
+            shape=(len(indptr) - 1, len(self.log_ratio))
+        )
+        matrix.sum_duplicates()
+        return matrix
+    
+    def add_documents(self, indices, indptr, labels):
+        """Add encoded documents; labels holds True for spam, False for ham"""
+        labels = np.asarray(labels, dtype=bool)
+        token_is_spam = np.repeat(labels, np.diff(indptr))
+        
+        # Work on the touched tokens only, so one email costs O(its tokens)
+        touched, inverse = np.unique(indices, return_inverse=True)
+        spam_add = np.bincount(inverse[token_is_spam], minlength=len(touched))
+        ham_add = np.bincount(inverse[~token_is_spam], minlength=len(touched))
+        
+        spam_before = self.spam_counts[touched]
+        ham_before = self.ham_counts[touched]
+        self.spam_distinct += int(np.count_nonzero((spam_before == 0) & (spam_add > 0)))
+        self.ham_distinct += int(np.count_nonzero((ham_before == 0) & (ham_add > 0)))
+        
+        spam_after = spam_before + spam_add
+        ham_after = ham_before + ham_add
+        self.spam_counts[touched] = spam_after
+        self.ham_counts[touched] = ham_after
+        self.log_ratio[touched] = np.log1p(spam_after) - np.log1p(ham_after)
+        
+        self.spam_total += int(spam_add.sum())
+        self.ham_total += int(ham_add.sum())
+        self.spam_count += int(labels.sum())
+        self.ham_count += int(len(labels) - labels.sum())
+    
+    def log_odds(self, indices, indptr, lengths):
+        """Return log P(doc|spam) - log P(doc|ham) for each encoded document"""
+        # Laplace-smoothed denominators: total count plus distinct words
+        spam_denominator = self.spam_total + self.spam_distinct
+        ham_denominator = self.ham_total + self.ham_distinct
+        if not spam_denominator or not ham_denominator:
+            return np.zeros(len(lengths), dtype=np.float64)
+        
+        if SCIPY_AVAILABLE:
+            scores = self.document_term_matrix(indices, indptr) @ self.log_ratio
+        else:
+            doc_ids = np.repeat(np.arange(len(lengths)), np.diff(indptr))
+            scores = np.bincount(
+                doc_ids,
+                weights=self.log_ratio[indices],
+                minlength=len(lengths)
+            )
+        scores -= lengths * (math.log(spam_denominator) - math.log(ham_denominator))
+        return scores
+    
+    def tokens(self):
+        """Return the vocabulary as a list ordered by index"""
+        tokens = [""] * len(self.vocabulary)
+        for word, index in self.vocabulary.items():
+            tokens[index] = word
+        return tokens
+    
+    def save(self, path):
+        """Atomically write the model to path as a memory-mappable snapshot"""
+        size = len(self)
+        # Tokens never contain whitespace, so a newline is a safe separator
+        vocabulary_blob = b"" if self.hash_size else "\n".join(self.tokens()).encode("utf-8")
+        
+        header = json.dumps({
+            "size": size,
+            "hash_size": self.hash_size,
+            "vocabulary_bytes": len(vocabulary_blob),
+            "spam_total": self.spam_total,
+            "ham_total": self.ham_total,
+            "spam_distinct": self.spam_distinct,
+            "ham_distinct": self.ham_distinct,
+            "spam_count": self.spam_count,
+            "ham_count": self.ham_count
+        }).encode("utf-8")
+        prefix = MODEL_MAGIC + len(header).to_bytes(8, "little") + header
+        padding = -len(prefix) % MODEL_ALIGNMENT
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".spam_model_")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(prefix + b"\0" * padding)
+                handle.write(np.ascontiguousarray(self.spam_counts[:size], dtype="<i8").tobytes())
+                handle.write(np.ascontiguousarray(self.ham_counts[:size], dtype="<i8").tobytes())
+                handle.write(np.ascontiguousarray(self.log_ratio[:size], dtype="<f8").tobytes())
+                handle.write(vocabulary_blob)
+                handle.flush()
+                os.fsync(handle.fileno())
+            # Readers see either the old snapshot or the new one, never half
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a snapshot written by save
+        
+        With mmap the count arrays are copy-on-write views of the file, so
+        processes that load the same snapshot share its pages until they
+        train.
+        """
+        with open(path, "rb") as handle:
+            if handle.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f"{path} is not a spam model snapshot")
+            header_length = int.from_bytes(handle.read(8), "little")
+            header = json.loads(handle.read(header_length))
+            offset = len(MODEL_MAGIC) + 8 + header_length
+            offset += -offset % MODEL_ALIGNMENT
+            size = header["size"]
+            handle.seek(offset + 3 * 8 * size)
+            vocabulary_blob = handle.read(header["vocabulary_bytes"])
+        
+        model = cls(capacity=0)
+        model.hash_size = header.get("hash_size")
+        # Building the dict dominates load time, so defer it to the first lookup
+        if size and not model.hash_size:
+            model._vocabulary_blob = vocabulary_blob
+        for position, (name, dtype) in enumerate(
+            [("spam_counts", "<i8"), ("ham_counts", "<i8"), ("log_ratio", "<f8")]
+        ):
+            array_offset = offset + position * 8 * size
+            if not size:
+                array = np.zeros(0, dtype=dtype)
+            elif mmap:
+                array = np.memmap(path, dtype=dtype, mode="c", offset=array_offset, shape=(size,))
+            else:
+                array = np.fromfile(path, dtype=dtype, count=size, offset=array_offset)
+            setattr(model, name, array)
+        for name in ("spam_total", "ham_total", "spam_distinct", "ham_distinct",
+                     "spam_count", "ham_count"):
+            setattr(model, name, header[name])
+        return model
+
+class SpamClassifier:
+    """Simple Naive Bayes spam classifier
+    
+    Memory is unbounded by default. Pass hash_size to hash tokens into a
+    fixed number of buckets, or max_vocabulary to prune the rarest tokens
+    whenever training pushes the vocabulary past that size.
+    """
+    
+    def __init__(self, model_path=None, hash_size=None, max_vocabulary=None):
+        self.model_path = model_path
+        self.max_vocabulary = max_vocabulary
+        
+        # Reuse a saved snapshot when there is one, otherwise pre-train
+        if model_path and os.path.exists(model_path):
+            self.model = NaiveBayesModel.load(model_path)
+            self.trained = True
+        else:
+            self.model = NaiveBayesModel(hash_size=hash_size)
+            self.trained = False
+            self._pretrain()
     
     def _pretrain(self):
         """Pre-train with common spam/ham indicators"""
@@ -47,31 +497,55 @@ class SpamClassifier:
             "The team lunch is at noon. See you there!"
         ]
         
-        for email in spam_samples:
-            self.train(email, is_spam=True)
-        
-        for email in ham_samples:
-            self.train(email, is_spam=False)
+        self.train_batch(
+            spam_samples + ham_samples,
+            [True] * len(spam_samples) + [False] * len(ham_samples)
+        )
         
         self.trained = True
     
     def preprocess(self, text):
-        """Clean and tokenize text"""
-        text = text.lower()
-        text = re.sub(f'[{re.escape(string.punctuation)}]', ' ', text)
-        words = text.split()
-        return [w for w in words if len(w) > 2]
+        """Clean and tokenize text, HTML or a raw MIME message (str or bytes)"""
+        words = []
+        for batch in tokenize_batches(text):
+            words.extend(batch)
+        return words
+    
+    def save(self, path=None):
+        """Save the trained model to path, or to the path it was loaded from"""
+        path = path or self.model_path
+        if not path:
+            raise ValueError("No model path given")
+        self.model.save(path)
+        self.model_path = path
     
     def train(self, text, is_spam):
         """Train classifier with labeled email"""
-        words = self.preprocess(text)
-        
-        if is_spam:
-            self.spam_words.update(words)
-            self.spam_count += 1
-        else:
-            self.ham_words.update(words)
-            self.ham_count += 1
+        self.train_batch([text], [is_spam])
+    
+    def train_batch(self, texts, labels):
+        """Train on many labeled emails in one vectorized pass"""
+        documents = [self.preprocess(text) for text in texts]
+        self._learn(self.model, documents, labels)
+    
+    def _learn(self, model, documents, labels):
+        """Add tokenized documents to model, pruning it if it grew too large"""
+        indices, indptr, _ = model.encode(documents, grow=True)
+        model.add_documents(indices, indptr, labels)
+        if self.max_vocabulary and not model.hash_size and len(model) > self.max_vocabulary:
+            model.prune(max_size=int(self.max_vocabulary * PRUNE_TARGET))
+    
+    def spam_probabilities(self, documents):
+        """Return P(spam) for each tokenized document as a NumPy array"""
+        # One consistent model even if another thread publishes a new one
+        model = self.model
+        scores = model.log_odds(*model.encode(documents))
+        # Numerically stable logistic, safe for arbitrarily long emails
+        return np.exp(-np.logaddexp(0.0, -scores))
+    
+    def spam_probability(self, words):
+        """Return P(spam) for one tokenized email"""
+        return float(self.spam_probabilities([words])[0])
     
     def classify(self, text):
         """Classify email as spam or ham"""
@@ -79,29 +553,140 @@ class SpamClassifier:
             return "Unknown", 0.5
         
         words = self.preprocess(text)
-        
-        # Calculate spam score
-        spam_score = 1.0
-        ham_score = 1.0
-        
-        total_spam_words = sum(self.spam_words.values()) + len(self.spam_words)
-        total_ham_words = sum(self.ham_words.values()) + len(self.ham_words)
-        
-        for word in words:
-            spam_prob = (self.spam_words.get(word, 0) + 1) / total_spam_words
-            ham_prob = (self.ham_words.get(word, 0) + 1) / total_ham_words
-            
-            spam_score *= spam_prob
-            ham_score *= ham_prob
-        
-        # Normalize
-        total = spam_score + ham_score
-        spam_probability = spam_score / total if total > 0 else 0.5
+        spam_probability = self.spam_probability(words)
         
         result = "SPAM" if spam_probability > 0.5 else "HAM"
         confidence = max(spam_probability, 1 - spam_probability)
         
         return result, confidence
+    
+    def classify_batch(self, texts):
+        """Classify many emails with one vectorized scoring call"""
+        if not self.trained:
+            return [("Unknown", 0.5) for _ in texts]
+        
+        probabilities = self.spam_probabilities([self.preprocess(text) for text in texts])
+        return [
+            ("SPAM", float(p)) if p > 0.5 else ("HAM", float(1 - p))
+            for p in probabilities
+        ]
+
+class OnlineSpamClassifier(SpamClassifier):
+    """SpamClassifier that keeps learning while other threads classify
+    
+    train() only appends to a write buffer. Two replicas of the model are
+    kept. Every merge_interval seconds (or as soon as max_buffer emails are
+    waiting), a background thread folds the buffer into the standby
+    replica and publishes it with a single reference swap. The replica it
+    replaced then becomes the standby, and catches up on that batch at the
+    next merge. A merge therefore costs O(batch), not O(model), for twice
+    the memory of one model.
+    
+    Readers pin the replica they score with, and the merger waits for the
+    pins on the standby to clear before writing to it. classify() never
+    takes a lock and always sees a complete model.
+    """
+    
+    def __init__(self, model_path=None, merge_interval=1.0, max_buffer=1000,
+                 hash_size=None, max_vocabulary=None):
+        self.merge_interval = merge_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        
+        super().__init__(model_path, hash_size, max_vocabulary)
+        self._standby = self.model.copy()
+        # Pins of the readers scoring with each replica, by id
+        self._readers = {id(self.model): set(), id(self._standby): set()}
+        # The batch the published replica has and the standby has not
+        self._replay = None
+        
+        # Pre-training went through the buffer, so publish it before serving
+        self.merge()
+        self.trained = True
+        
+        self._merger = threading.Thread(target=self._merge_loop, daemon=True)
+        self._merger.start()
+    
+    def _merge_loop(self):
+        """Merge the write buffer on a schedule until closed"""
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.merge_interval)
+            self._wakeup.clear()
+            self.merge()
+    
+    def train_batch(self, texts, labels):
+        """Queue labeled emails for the next merge"""
+        # Tokenize outside the lock so writers never block each other for long
+        pending = [(self.preprocess(text), bool(label)) for text, label in zip(texts, labels)]
+        with self._buffer_lock:
+            self._buffer.extend(pending)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wakeup.set()
+    
+    def pending(self):
+        """Number of emails waiting for the next merge"""
+        return len(self._buffer)
+    
+    def spam_probabilities(self, documents):
+        """Return P(spam) for each tokenized document as a NumPy array"""
+        pin = object()
+        while True:
+            model = self.model
+            readers = self._readers[id(model)]
+            readers.add(pin)
+            # Published meanwhile: the merger may already be writing to it
+            if model is self.model:
+                break
+            readers.discard(pin)
+        try:
+            scores = model.log_odds(*model.encode(documents))
+        finally:
+            readers.discard(pin)
+        return np.exp(-np.logaddexp(0.0, -scores))
+    
+    def merge(self):
+        """Fold buffered emails into a new model and publish it
+        
+        Returns True if a new model was published.
+        """
+        with self._merge_lock:
+            with self._buffer_lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return False
+            
+            documents, labels = zip(*pending)
+            model = self._standby
+            readers = self._readers[id(model)]
+            while readers:
+                time.sleep(0.0005)
+            if self._replay:
+                self._learn(model, *self._replay)
+            self._learn(model, documents, labels)
+            
+            # Assigning an attribute is atomic, so readers see old or new
+            self._standby, self.model = self.model, model
+            self._replay = (documents, labels)
+            return True
+    
+    def save(self, path=None):
+        """Merge anything buffered, then save the published model"""
+        self.merge()
+        # Holding the merge lock keeps the published replica unchanged
+        with self._merge_lock:
+            super().save(path)
+    
+    def close(self):
+        """Stop the merge thread after publishing any buffered emails"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._merger.join()
+        self.merge()
 
 class SpamEmailGUI:
     """GUI for Spam Email Classifier"""
@@ -112,7 +697,7 @@ class SpamEmailGUI:
         self.root.geometry("700x600")
         self.root.resizable(True, True)
         
-        self.classifier = SpamClassifier()
+        self.classifier = SpamClassifier(DEFAULT_MODEL_PATH)
         
         self.setup_ui()
         
@@ -247,6 +832,12 @@ class SpamEmailGUI:
         
         self.classifier.train(email_text, is_spam)
         
+        # Persist right away so the lesson survives a restart
+        try:
+            self.classifier.save()
+        except OSError as e:
+            messagebox.showwarning("Warning", f"Could not save model: {str(e)}")
+        
         label = "spam" if is_spam else "ham"
         messagebox.showinfo(
             "Training Complete",
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Spam Email Scoring Service
+A local asyncio HTTP service that scores emails in micro-batches
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import socket
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from spam_email import OnlineSpamClassifier
+
+# Largest request body accepted, to keep one client from exhausting memory
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Latencies kept for the p50/p99 counters
+LATENCY_WINDOW = 10000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class MicroBatcher:
+    """Collects concurrent score requests and scores them together
+
+    The first waiting request opens a batch; more requests join until
+    batch_window seconds pass or max_batch are waiting. The whole batch is
+    then scored with one vectorized call on a worker thread, so the event
+    loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, classifier, batch_window=0.005, max_batch=64):
+        self.classifier = classifier
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def score(self, payload):
+        """Queue one email and wait for its spam probability"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, future, time.perf_counter()))
+        return await future
+
+    def _score_batch(self, payloads):
+        classifier = self.classifier
+        return classifier.spam_probabilities([classifier.preprocess(p) for p in payloads])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                probabilities = await loop.run_in_executor(
+                    None, self._score_batch, [payload for payload, _, _ in batch]
+                )
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            for (_, future, queued), probability in zip(batch, probabilities):
+                self.latencies.append(finished - queued)
+                if not future.done():
+                    future.set_result(float(probability))
+            self.requests += len(batch)
+            self.batches += 1
+
+    def metrics(self):
+        """Queue depth, throughput counters and p50/p99 latency in ms"""
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+        return {
+            "queue_depth": self.queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "latency_ms": {"p50": percentile(0.50), "p99": percentile(0.99)}
+        }
+
+
+class SpamService:
+    """Minimal HTTP/1.1 front end for a MicroBatcher
+
+    POST /classify    body is the email (plain text or raw MIME)
+    POST /train?label=spam|ham    queue the email as training feedback
+    GET  /metrics     queue depth, counters and latency percentiles
+    GET  /health      liveness check
+    """
+
+    def __init__(self, classifier, batch_window=0.005, max_batch=64):
+        self.classifier = classifier
+        self.batcher = MicroBatcher(classifier, batch_window, max_batch)
+
+    async def start(self, host="127.0.0.1", port=8025, unix_socket=None):
+        """Start listening and return the asyncio server"""
+        self.batcher.start()
+        if unix_socket:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def stop(self):
+        await self.batcher.stop()
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            status = 413 if "too large" in str(e) else 400
+            self._write_response(writer, status, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ValueError("malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/classify":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            probability = await self.batcher.score(body)
+            label = "SPAM" if probability > 0.5 else "HAM"
+            return 200, {"label": label, "probability": probability}
+        if url.path == "/train":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            label = parse_qs(url.query).get("label", [""])[0].lower()
+            if label not in ("spam", "ham"):
+                return 400, {"error": "label must be spam or ham"}
+            # Tokenizing a large body would stall every pending /classify
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.classifier.train, body, label == "spam"
+            )
+            return 200, {"queued": True}
+        if url.path == "/metrics":
+            return 200, self.batcher.metrics()
+        if url.path == "/health":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"unknown path {url.path}"}
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, path, timeout=30):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class SpamServiceClient:
+    """Blocking client for SpamService, reusing one keep-alive connection"""
+
+    def __init__(self, host="127.0.0.1", port=8025, unix_socket=None, timeout=30):
+        if unix_socket:
+            self.connection = UnixHTTPConnection(unix_socket, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method, path, body=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.connection.request(method, path, body=body)
+        response = self.connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError(f"{response.status}: {payload.get('error')}")
+        return payload
+
+    def classify(self, message):
+        """Return (label, spam probability) for a message as str or bytes"""
+        result = self._request("POST", "/classify", message)
+        return result["label"], result["probability"]
+
+    def train(self, message, is_spam):
+        self._request("POST", f"/train?label={'spam' if is_spam else 'ham'}", message)
+
+    def metrics(self):
+        return self._request("GET", "/metrics")
+
+    def close(self):
+        self.connection.close()
+
+
+async def serve(args):
+    classifier = OnlineSpamClassifier(args.model)
+    service = SpamService(classifier, args.batch_window / 1000, args.max_batch)
+    server = await service.start(args.host, args.port, args.unix_socket)
+    where = args.unix_socket or f"{args.host}:{args.port}"
+    print(f"Scoring service listening on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+        classifier.close()
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Local spam scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--unix-socket", help="listen on / connect to this Unix socket instead of TCP")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    server = commands.add_parser("serve", help="run the scoring service")
+    server.add_argument("-m", "--model", help="saved model snapshot (default: built-in pre-trained model)")
+    server.add_argument("--batch-window", type=float, default=5.0, help="milliseconds to gather a batch")
+    server.add_argument("--max-batch", type=int, default=64, help="largest batch scored at once")
+
+    commands.add_parser("classify", help="score the message on stdin")
+    commands.add_parser("metrics", help="print the service counters")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    client = SpamServiceClient(args.host, args.port, args.unix_socket)
+    try:
+        if args.command == "classify":
+            label, probability = client.classify(sys.stdin.buffer.read())
+            print(f"{label} {probability:.6f}")
+        else:
+            print(json.dumps(client.metrics(), indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tokenizer and model tests: plain text must tokenize as it always has, as str or bytes"""
+
+import random
+import string
+import unittest
+
+from spam_email import NaiveBayesModel, OnlineSpamClassifier, SpamClassifier, tokenize
+
+MIME_MESSAGE = (
+    b"From: sender@example.com\r\n"
+    b"Subject: Claim your prize\r\n"
+    b"MIME-Version: 1.0\r\n"
+    b"Content-Type: text/html; charset=utf-8\r\n"
+    b"\r\n"
+    b"<p>Click <b>here</b> for free money &amp; pills</p>\r\n"
+)
+
+# Plain text pieces with stray angle brackets, ampersands and header-like words
+PLAIN_PIECES = [
+    "price", "cheap", "pills", "URGENT:", "Subject:", "From", "5", "<", "10",
+    "&", "&amp;", "a<b", "c>d", "x>y", "<3", "->", "<-", "don't", "e-mail",
+    "money!", "café", "naïve", "1,000", "(free)", "\n", "\n\n"
+]
+
+
+def legacy_tokens(text):
+    """The original preprocess: lowercase, punctuation to spaces, words over two letters"""
+    words = text.lower().translate(str.maketrans(string.punctuation, " " * len(string.punctuation))).split()
+    return [w for w in words if len(w) > 2]
+
+
+class TokenizeTest(unittest.TestCase):
+
+    def test_header_like_plain_text(self):
+        text = "URGENT: click here to claim your prize money now"
+        expected = legacy_tokens(text)
+        self.assertEqual(list(tokenize(text)), expected)
+        self.assertEqual(list(tokenize(text.encode("utf-8"))), expected)
+
+    def test_plain_text_matches_legacy_tokens(self):
+        rng = random.Random(0)
+        for _ in range(3000):
+            text = " ".join(rng.choice(PLAIN_PIECES) for _ in range(rng.randrange(1, 30)))
+            expected = legacy_tokens(text)
+            self.assertEqual(list(tokenize(text)), expected, text)
+            self.assertEqual(list(tokenize(text.encode("utf-8"))), expected, text)
+
+    def test_stray_angle_brackets_are_not_tags(self):
+        self.assertEqual(list(tokenize("Price 5 < 10 & cheap <br> pills")), ["price", "cheap", "pills"])
+        self.assertEqual(list(tokenize("if a<b and c>d then <p is fine")), ["and", "then", "fine"])
+
+    def test_html_markup_is_dropped(self):
+        tokens = list(tokenize("<html><body><p>Free <b>money</b> &amp; pills</p></body></html>"))
+        self.assertEqual(tokens, ["free", "money", "pills"])
+
+    def test_mime_as_bytes_and_str(self):
+        expected = ["claim", "your", "prize", "click", "here", "for", "free", "money", "pills"]
+        self.assertEqual(list(tokenize(MIME_MESSAGE)), expected)
+        self.assertEqual(list(tokenize(MIME_MESSAGE.decode("utf-8"))), expected)
+
+    def test_classify_plain_bytes_like_str(self):
+        classifier = SpamClassifier()
+        text = "URGENT: click here to claim your prize money now"
+        self.assertEqual(classifier.classify(text.encode("utf-8")), classifier.classify(text))
+        self.assertEqual(classifier.classify(text)[0], "SPAM")
+
+
+class PruneTest(unittest.TestCase):
+
+    def test_prune_fills_the_cap_by_count(self):
+        model = NaiveBayesModel()
+        documents = [["common", "rare1"], ["common", "rare2"], ["common", "rare3"], ["twice", "twice"]]
+        model.add_documents(*model.encode(documents, grow=True)[:2], [True, False, True, False])
+        self.assertEqual(model.prune(max_size=3), 2)
+        self.assertEqual(sorted(model.tokens()), ["common", "rare1", "twice"])
+        self.assertEqual(model.spam_total + model.ham_total, 6)
+
+    def test_max_vocabulary_keeps_the_cap_filled(self):
+        classifier = SpamClassifier(max_vocabulary=50)
+        self.assertEqual(len(classifier.model), 40)
+
+
+class OnlineMergeTest(unittest.TestCase):
+
+    def test_replicas_match_direct_training(self):
+        rng = random.Random(1)
+        batches = [
+            [(" ".join(rng.choice(PLAIN_PIECES) for _ in range(20)), rng.random() < 0.5) for _ in range(5)]
+            for _ in range(4)
+        ]
+        online = OnlineSpamClassifier(merge_interval=3600)
+        self.addCleanup(online.close)
+        direct = SpamClassifier()
+        for batch in batches:
+            texts, labels = zip(*batch)
+            published = online.model
+            online.train_batch(texts, labels)
+            online.merge()
+            direct.train_batch(texts, labels)
+            # The merge trained the standby replica instead of copying
+            self.assertIs(online._standby, published)
+            self.assertEqual(online.model.spam_total, direct.model.spam_total)
+            self.assertEqual(online.classify_batch(texts), direct.classify_batch(texts))
+
+        # The standby has everything up to the batch before the last one
+        before = direct.model.copy()
+        online.train("meeting notes attached", False)
+        online.merge()
+        direct.train("meeting notes attached", False)
+        for model, expected in ((online.model, direct.model), (online._standby, before)):
+            self.assertEqual(model.tokens(), expected.tokens())
+            self.assertEqual(model.ham_total, expected.ham_total)
+            self.assertEqual(model.ham_counts[:len(model)].tolist(), expected.ham_counts[:len(expected)].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
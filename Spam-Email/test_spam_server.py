@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Scoring service tests: a real SpamService on a Unix socket and its client"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from spam_email import OnlineSpamClassifier
+from spam_server import SpamService, SpamServiceClient
+
+PLAIN_SPAM = "URGENT: claim your prize money now"
+
+MIME_SPAM = (
+    b"From: sender@example.com\r\n"
+    b"Subject: You have won\r\n"
+    b"MIME-Version: 1.0\r\n"
+    b"Content-Type: multipart/mixed; boundary=XYZ\r\n"
+    b"\r\n"
+    b"--XYZ\r\n"
+    b"Content-Type: text/html\r\n"
+    b"\r\n"
+    b"<p>Claim your <b>prize</b> money now!</p>\r\n"
+    b"--XYZ\r\n"
+    b"Content-Type: application/octet-stream\r\n"
+    b"Content-Transfer-Encoding: base64\r\n"
+    b"\r\n"
+    b"bWVldGluZyBjb2ZmZWUgdGhhbmsgeW91\r\n"
+    b"--XYZ--\r\n"
+)
+
+
+class SpamServiceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.directory.name, "spam.sock")
+        cls.classifier = OnlineSpamClassifier(merge_interval=0.05)
+        # A wide window, so concurrent requests reliably share a batch
+        cls.service = SpamService(cls.classifier, batch_window=0.05, max_batch=64)
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        cls.server = asyncio.run_coroutine_threadsafe(
+            cls.service.start(unix_socket=cls.socket_path), cls.loop
+        ).result(10)
+
+    @classmethod
+    def tearDownClass(cls):
+        async def shutdown():
+            cls.server.close()
+            await cls.server.wait_closed()
+            await cls.service.stop()
+        asyncio.run_coroutine_threadsafe(shutdown(), cls.loop).result(10)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(10)
+        cls.loop.close()
+        cls.classifier.close()
+        cls.directory.cleanup()
+
+    def client(self):
+        client = SpamServiceClient(unix_socket=self.socket_path, timeout=10)
+        self.addCleanup(client.close)
+        return client
+
+    def test_plain_text_matches_local_classifier(self):
+        label, probability = self.client().classify(PLAIN_SPAM)
+        self.assertEqual(label, "SPAM")
+        expected = self.classifier.spam_probability(self.classifier.preprocess(PLAIN_SPAM))
+        self.assertAlmostEqual(probability, expected)
+
+    def test_mime_body(self):
+        label, probability = self.client().classify(MIME_SPAM)
+        self.assertEqual(label, "SPAM")
+        # The attachment's words must not count
+        expected = self.classifier.spam_probability(self.classifier.preprocess(MIME_SPAM))
+        self.assertAlmostEqual(probability, expected)
+
+    def test_concurrent_requests_share_batches(self):
+        before = self.client().metrics()
+        clients = [self.client() for _ in range(16)]
+        barrier = threading.Barrier(len(clients))
+        results = [None] * len(clients)
+
+        def send(index, client):
+            barrier.wait()
+            results[index] = client.classify(PLAIN_SPAM)
+
+        threads = [threading.Thread(target=send, args=item) for item in enumerate(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertTrue(all(result is not None and result[0] == "SPAM" for result in results))
+        after = self.client().metrics()
+        requests = after["requests"] - before["requests"]
+        batches = after["batches"] - before["batches"]
+        self.assertEqual(requests, len(clients))
+        self.assertLess(batches, requests)
+
+    def test_metrics(self):
+        client = self.client()
+        client.classify("meeting at noon tomorrow")
+        metrics = client.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertGreaterEqual(metrics["requests"], 1)
+        self.assertGreaterEqual(metrics["batches"], 1)
+        self.assertGreater(metrics["mean_batch_size"], 0)
+        self.assertGreaterEqual(metrics["latency_ms"]["p99"], metrics["latency_ms"]["p50"])
+
+    def test_train_and_errors(self):
+        client = self.client()
+        client.train("quarterly planning review notes", False)
+        with self.assertRaisesRegex(RuntimeError, "400"):
+            client._request("POST", "/train?label=maybe", "text")
+        with self.assertRaisesRegex(RuntimeError, "404"):
+            client._request("GET", "/nowhere")
+
+
+if __name__ == "__main__":
+    unittest.main()
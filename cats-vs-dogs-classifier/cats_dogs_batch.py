@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Cats vs Dogs Batch Classifier
+Label a folder of images without the GUI, streaming them through tf.data.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from cats_dogs_cache import DEFAULT_CACHE_PATH, TF_PIPELINE, PredictionCache, bytes_digest
+from cats_dogs_lite import DEFAULT_MODEL_PATH, create_backend
+from cats_vs_dogs_classifier import IMAGE_SIZE, TF_AVAILABLE, classify_predictions
+
+if TF_AVAILABLE:
+    import tensorflow as tf
+    from tensorflow import keras
+
+# Image types the batch classifier picks up
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif")
+
+RESULT_FIELDS = ["path", "label", "confidence", "cat_confidence", "dog_confidence", "top_class", "top_confidence"]
+
+
+def default_batch_size():
+    """A batch size that keeps every core busy without swamping memory."""
+    return min(256, 16 * (os.cpu_count() or 1))
+
+
+def iter_image_files(directory, extensions=IMAGE_EXTENSIONS):
+    """Yield image paths under directory, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                yield os.path.join(root, name)
+
+
+def _decode(data):
+    """Decode, resize and normalize one image inside the tf.data graph."""
+    image = tf.io.decode_image(data, channels=3, expand_animations=False)
+    image = tf.image.resize(image, IMAGE_SIZE)
+    return keras.applications.mobilenet_v2.preprocess_input(image)
+
+
+def _load_image(path):
+    return path, _decode(tf.io.read_file(path))
+
+
+def _digest_tensor(data):
+    return bytes_digest(data.numpy())
+
+
+def _load_image_with_digest(path):
+    """Like _load_image, also hashing the bytes it has read (hashlib releases the GIL)."""
+    data = tf.io.read_file(path)
+    digest = tf.py_function(_digest_tensor, [data], tf.string)
+    digest.set_shape(())
+    return path, digest, _decode(data)
+
+
+def image_dataset(paths, batch_size, counter=None, digests=False):
+    """Batches of (paths, images) streamed from an iterable of file paths.
+
+    Decoding and resizing run in parallel and the next batches are prefetched
+    while the model works on the current one. With digests, batches are
+    (paths, digests, images) and each file is hashed in the same parallel
+    step, from the bytes read for decoding. Files that fail to decode are
+    dropped; counter, a one-item list, counts every path fed in.
+    """
+    def generate():
+        for path in paths:
+            if counter is not None:
+                counter[0] += 1
+            yield path
+
+    dataset = tf.data.Dataset.from_generator(
+        generate,
+        output_signature=tf.TensorSpec(shape=(), dtype=tf.string)
+    )
+    dataset = dataset.map(
+        _load_image_with_digest if digests else _load_image,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=True
+    )
+    dataset = dataset.apply(tf.data.experimental.ignore_errors())
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def classify_batch(backend, paths, images):
+    """Classify one preprocessed batch with a Keras or TFLite backend.
+
+    Returns (predictions, a result dict per image).
+    """
+    predictions = backend.predict(images)
+    return predictions, results_from_predictions(backend, paths, predictions)
+
+
+def results_from_predictions(backend, paths, predictions):
+    """Result dicts for an (N, 1000) probability matrix."""
+    labels, scores = classify_predictions(predictions)
+    top_classes = backend.decode(predictions, top=1)
+    results = []
+    for path, label, (cat_confidence, dog_confidence), top in zip(paths, labels, scores, top_classes):
+        confidence = cat_confidence if label == "cat" else dog_confidence if label == "dog" else 0.0
+        results.append({
+            "path": path,
+            "label": str(label),
+            "confidence": float(confidence),
+            "cat_confidence": float(cat_confidence),
+            "dog_confidence": float(dog_confidence),
+            "top_class": top[0][1],
+            "top_confidence": float(top[0][2])
+        })
+    return results
+
+
+class ResultWriter:
+    """Writes results as CSV or JSONL, flushing after every batch."""
+
+    def __init__(self, handle, output_format):
+        self.handle = handle
+        self.output_format = output_format
+        self.writer = None
+        if output_format == "csv":
+            self.writer = csv.DictWriter(handle, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+
+    def write_batch(self, results):
+        for result in results:
+            if self.writer:
+                self.writer.writerow(result)
+            else:
+                self.handle.write(json.dumps(result) + "\n")
+        self.handle.flush()
+
+
+def _cache_lookup(paths, cache):
+    """Split paths into cache hits and misses without reading any image.
+
+    A file counts as seen when its path, size and mtime match a remembered
+    digest. Returns (hit paths, their probabilities, misses) where misses
+    maps each remaining path to its (size, mtime_ns), or None if it cannot
+    be stat'ed.
+    """
+    misses = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            misses[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            misses[path] = None  # the pipeline drops and counts it
+    known = cache.known_digests(
+        (path, *stat) for path, stat in misses.items() if stat is not None
+    )
+    found = cache.get_many(set(known.values()))
+    hit_paths = [path for path, digest in known.items() if digest in found]
+    for path in hit_paths:
+        del misses[path]
+    probabilities = np.stack([found[known[path]] for path in hit_paths]) if hit_paths else None
+    return hit_paths, probabilities, misses
+
+
+def classify_folder(directory, writer, batch_size=None, backend=None, cache=None, progress=sys.stderr):
+    """Classify every image under directory; returns (classified, failed, seconds).
+
+    With a PredictionCache, a first pass answers every image seen before by
+    the same model from the cache, a batch at a time and without decoding it.
+    Only the misses are then streamed through the model.
+    """
+    backend = backend or create_backend("keras")
+    batch_size = batch_size or default_batch_size()
+    counter = [0]
+    predicted = 0
+    cached = 0
+    start = time.perf_counter()
+
+    def report():
+        if progress:
+            elapsed = time.perf_counter() - start
+            done = predicted + cached
+            progress.write(f"\r{done} images ({cached} cached), {done / elapsed:.1f} images/s")
+            progress.flush()
+
+    paths = iter_image_files(directory)
+    stats = {}
+    if cache is not None:
+        while True:
+            chunk = list(islice(paths, batch_size))
+            if not chunk:
+                break
+            hit_paths, probabilities, misses = _cache_lookup(chunk, cache)
+            if hit_paths:
+                writer.write_batch(results_from_predictions(backend, hit_paths, probabilities))
+                cached += len(hit_paths)
+                report()
+            stats.update(misses)
+        paths = list(stats)
+
+    dataset = image_dataset(paths, batch_size, counter, digests=cache is not None)
+    for batch in dataset:
+        if cache is not None:
+            batch_paths, digests, images = batch
+            digests = [digest.decode("ascii") for digest in digests.numpy()]
+        else:
+            batch_paths, images = batch
+        batch_paths = [path.decode("utf-8") for path in batch_paths.numpy()]
+        predictions, results = classify_batch(backend, batch_paths, images)
+        writer.write_batch(results)
+        predicted += len(results)
+        if cache is not None:
+            cache.put_many(list(zip(digests, predictions)))
+            cache.remember_digests([
+                (path, *stats[path], digest)
+                for path, digest in zip(batch_paths, digests) if stats.get(path) is not None
+            ])
+        report()
+    elapsed = time.perf_counter() - start
+    if progress:
+        progress.write("\n")
+    return predicted + cached, counter[0] - predicted, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a folder of images as cats or dogs")
+    parser.add_argument("images", help="directory of images")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("-b", "--batch-size", type=int, default=default_batch_size())
+    parser.add_argument("--backend", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH, help="quantized model for --backend tflite")
+    parser.add_argument("--threads", type=int, default=0, help="TFLite interpreter threads (default: all cores)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="prediction cache file")
+    parser.add_argument("--no-cache", action="store_true", help="always run the model")
+    args = parser.parse_args(argv)
+
+    if not TF_AVAILABLE:
+        parser.error("TensorFlow is required: pip install tensorflow pillow numpy")
+
+    backend = create_backend(args.backend, args.model_path, args.threads or None)
+    cache = None if args.no_cache else PredictionCache(backend.identity(), TF_PIPELINE, args.cache)
+    handle = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        classified, failed, elapsed = classify_folder(
+            args.images,
+            ResultWriter(handle, args.format),
+            args.batch_size,
+            backend,
+            cache
+        )
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    rate = classified / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Classified {classified} images in {elapsed:.1f}s ({rate:.1f} images/s), {failed} failed",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Cats vs Dogs Prediction Cache
+A persistent LRU cache of ImageNet probabilities keyed by image content and model.
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "predictions.sqlite")
+
+# Bump when decoding or preprocessing changes, so old probabilities are not reused
+PREPROCESS_VERSION = 1
+
+# How an image becomes a model input. The window decodes with PIL in draft
+# mode, batch jobs with tf.data; the tensors differ, so their entries must too.
+PIL_PIPELINE = "pil-draft"
+TF_PIPELINE = "tf-data"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    probabilities BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_by_use ON predictions (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_use ON files (last_used);
+"""
+
+# Keys per SQL statement, well under SQLite's bound-variable limit
+LOOKUP_CHUNK = 500
+
+
+def file_digest(path):
+    """Content hash of a file, independent of its name or location."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    """file_digest of a file whose content is already in memory."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def keras_identity(model):
+    """Identity of a Keras model: its name and a hash of every weight."""
+    digest = hashlib.blake2b(digest_size=16)
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return f"keras:{model.name}:{digest.hexdigest()}"
+
+
+def tflite_identity(model_path):
+    return f"tflite:{file_digest(model_path)}"
+
+
+class PredictionCache:
+    """Probability vectors in SQLite, keyed by image digest, model and pipeline.
+
+    Any change of model, weights, backend or input pipeline changes the key,
+    so stale entries are never returned and age out through the LRU bound,
+    which every write enforces. A second table remembers the digest of each
+    file by path, size and mtime, so unchanged files need no rehashing.
+    Each thread gets its own connection; WAL mode lets several processes
+    read and write the same file.
+    """
+
+    def __init__(self, model_identity, pipeline, path=DEFAULT_CACHE_PATH, max_entries=50000):
+        self.model = f"{model_identity}:{pipeline}:v{PREPROCESS_VERSION}"
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+        self.prune()
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _key(self, digest):
+        return f"{self.model}:{digest}"
+
+    def get(self, digest):
+        """Return the cached probability vector of an image, or None."""
+        db = self._connection()
+        key = self._key(digest)
+        row = db.execute("SELECT probabilities FROM predictions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with db:
+            db.execute("UPDATE predictions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return np.frombuffer(row[0], dtype="<f4")
+
+    def get_many(self, digests):
+        """Return {digest: probability vector} for the cached images among digests."""
+        db = self._connection()
+        keys = {self._key(digest): digest for digest in digests}
+        found = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), LOOKUP_CHUNK):
+            chunk = key_list[start:start + LOOKUP_CHUNK]
+            rows = db.execute(
+                f"SELECT key, probabilities FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[keys[key]] = np.frombuffer(blob, dtype="<f4")
+        if found:
+            now = time.time()
+            with db:
+                db.executemany(
+                    "UPDATE predictions SET last_used = ? WHERE key = ?",
+                    ((now, self._key(digest)) for digest in found)
+                )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def known_digests(self, files):
+        """Digests of files whose (path, size, mtime_ns) match a remembered hash.
+
+        Returns {path: digest}; changed or unknown files are left out.
+        """
+        db = self._connection()
+        files = {path: (size, mtime_ns) for path, size, mtime_ns in files}
+        found = {}
+        paths = list(files)
+        for start in range(0, len(paths), LOOKUP_CHUNK):
+            chunk = paths[start:start + LOOKUP_CHUNK]
+            rows = db.execute(
+                f"SELECT path, size, mtime_ns, digest FROM files WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for path, size, mtime_ns, digest in rows:
+                if files[path] == (size, mtime_ns):
+                    found[path] = digest
+        return found
+
+    def remember_digests(self, files):
+        """Remember (path, size, mtime_ns, digest) tuples for known_digests."""
+        db = self._connection()
+        now = time.time()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest, last_used) VALUES (?, ?, ?, ?, ?)",
+                ((path, size, mtime_ns, digest, now) for path, size, mtime_ns, digest in files)
+            )
+            self._prune(db, "files")
+
+    def put(self, digest, probabilities):
+        """Store the probability vector of an image."""
+        self.put_many([(digest, probabilities)])
+
+    def put_many(self, items):
+        """Store (digest, probabilities) pairs in one transaction."""
+        db = self._connection()
+        now = time.time()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO predictions (key, probabilities, last_used) VALUES (?, ?, ?)",
+                ((self._key(digest), np.asarray(probabilities, dtype="<f4").tobytes(), now)
+                 for digest, probabilities in items)
+            )
+            self._prune(db, "predictions")
+
+    def _prune(self, db, table):
+        db.execute(
+            f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used "
+            f"LIMIT max(0, (SELECT COUNT(*) FROM {table}) - ?))",
+            (self.max_entries,)
+        )
+
+    def prune(self):
+        """Drop the least recently used entries beyond max_entries."""
+        db = self._connection()
+        with db:
+            self._prune(db, "predictions")
+            self._prune(db, "files")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM predictions")
+            db.execute("DELETE FROM files")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the prediction cache")
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print("No cache yet")
+        return
+    db = sqlite3.connect(args.path)
+    if args.command == "clear":
+        with db:
+            db.execute("DELETE FROM predictions")
+            db.execute("DELETE FROM files")
+        db.execute("VACUUM")
+        print("Cache cleared")
+        return
+    count = db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    models = db.execute(
+        "SELECT substr(key, 1, length(key) - 33), COUNT(*) FROM predictions GROUP BY 1"
+    ).fetchall()
+    print(f"{count} cached predictions, {os.path.getsize(args.path) / 1e6:.1f} MB")
+    for model, entries in models:
+        print(f"  {entries:>8}  {model}")
+
+
+if __name__ == "__main__":
+    main()
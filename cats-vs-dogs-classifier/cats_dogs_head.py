@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Cats vs Dogs Embedding Head
+Train a small classifier on cached MobileNetV2 embeddings of a labeled folder.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from cats_dogs_batch import default_batch_size, image_dataset, iter_image_files
+from cats_dogs_cache import PREPROCESS_VERSION, file_digest, keras_identity
+from cats_vs_dogs_classifier import IMAGE_SIZE, TF_AVAILABLE, load_tensorflow
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(HERE, "embeddings")
+DEFAULT_HEAD_PATH = os.path.join(HERE, "pet_head.npz")
+
+# Width of MobileNetV2's pooled features
+EMBEDDING_DIM = 1280
+
+
+def create_backbone():
+    """MobileNetV2 without its ImageNet classifier, pooled to one vector per image."""
+    keras = load_tensorflow()
+    return keras.applications.MobileNetV2(
+        weights='imagenet',
+        include_top=False,
+        pooling='avg',
+        input_shape=IMAGE_SIZE + (3,)
+    )
+
+
+def backbone_identity(backbone):
+    """Embeddings are only reusable with the same weights and preprocessing."""
+    return f"{keras_identity(backbone)}:v{PREPROCESS_VERSION}"
+
+
+def labeled_images(directory):
+    """Yield (path, label) pairs, labelled by each image's top-level subfolder."""
+    for path in iter_image_files(directory):
+        relative = os.path.relpath(path, directory)
+        if os.sep in relative:
+            yield path, relative.split(os.sep)[0]
+
+
+class EmbeddingStore:
+    """Backbone embeddings on disk, keyed by image content.
+
+    Vectors are appended to one raw float32 file that is read back as a
+    memory map, so the store opens instantly at any size. Line i of the
+    digest file names the image of row i. Another backbone identity empties
+    the store.
+    """
+
+    def __init__(self, identity, path=DEFAULT_STORE_PATH, dim=EMBEDDING_DIM):
+        self.identity = identity
+        self.dim = dim
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.digests_path = os.path.join(path, "digests.txt")
+        self.identity_path = os.path.join(path, "identity.txt")
+        os.makedirs(path, exist_ok=True)
+        self._vectors = None
+
+        stored_identity = None
+        if os.path.exists(self.identity_path):
+            with open(self.identity_path, encoding="utf-8") as handle:
+                stored_identity = handle.read().strip()
+        digests = []
+        if stored_identity == f"{identity} {dim}" and os.path.exists(self.digests_path):
+            with open(self.digests_path, encoding="utf-8") as handle:
+                digests = handle.read().split()
+        else:
+            with open(self.identity_path, "w", encoding="utf-8") as handle:
+                handle.write(f"{identity} {dim}\n")
+
+        # A run stopped between the two appends leaves one file longer; cut both to match
+        row_bytes = dim * 4
+        vector_rows = 0
+        if digests and os.path.exists(self.vectors_path):
+            vector_rows = os.path.getsize(self.vectors_path) // row_bytes
+        digests = digests[:vector_rows]
+        with open(self.vectors_path, "ab") as handle:
+            handle.truncate(len(digests) * row_bytes)
+        with open(self.digests_path, "w", encoding="utf-8") as handle:
+            handle.write("".join(f"{digest}\n" for digest in digests))
+        self.rows = {digest: row for row, digest in enumerate(digests)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, digest):
+        return digest in self.rows
+
+    @property
+    def vectors(self):
+        """All stored embeddings as a read-only (rows, dim) memory map."""
+        if self._vectors is None or len(self._vectors) != len(self.rows):
+            if not self.rows:
+                return np.zeros((0, self.dim), dtype="<f4")
+            self._vectors = np.memmap(self.vectors_path, dtype="<f4", mode="r", shape=(len(self.rows), self.dim))
+        return self._vectors
+
+    def get_many(self, digests):
+        """Embeddings of the given images, as an in-memory (N, dim) array."""
+        return self.vectors[[self.rows[digest] for digest in digests]]
+
+    def add_many(self, digests, vectors):
+        """Append the embeddings of images not stored yet."""
+        new = {}
+        for digest, vector in zip(digests, vectors):
+            if digest not in self.rows and digest not in new:
+                new[digest] = vector
+        if not new:
+            return
+        with open(self.vectors_path, "ab") as handle:
+            handle.write(np.asarray(list(new.values()), dtype="<f4").tobytes())
+        with open(self.digests_path, "a", encoding="utf-8") as handle:
+            handle.write("".join(f"{digest}\n" for digest in new))
+        for digest in new:
+            self.rows[digest] = len(self.rows)
+
+
+def embed_images(paths, store, backbone, batch_size=None, progress=sys.stderr):
+    """Make sure every image has a stored embedding; returns {path: digest}.
+
+    Only images the store has never seen go through the backbone. Images
+    that cannot be read or decoded are left out of the result.
+    """
+    digests = {}
+    missing = []
+    queued = set()
+    for path in paths:
+        try:
+            digest = file_digest(path)
+        except OSError:
+            continue
+        digests[path] = digest
+        if digest not in store and digest not in queued:
+            missing.append(path)
+            queued.add(digest)
+
+    if missing:
+        start = time.perf_counter()
+        done = 0
+        for batch_paths, images in image_dataset(missing, batch_size or default_batch_size()):
+            batch_paths = [path.decode("utf-8") for path in batch_paths.numpy()]
+            vectors = backbone(images, training=False).numpy()
+            store.add_many([digests[path] for path in batch_paths], vectors)
+            done += len(batch_paths)
+            if progress:
+                progress.write(f"\rEmbedded {done}/{len(missing)} new images, {done / (time.perf_counter() - start):.1f} images/s")
+                progress.flush()
+        if progress:
+            progress.write("\n")
+    return {path: digest for path, digest in digests.items() if digest in store}
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def train_head(features, targets, num_classes, l2=1e-3, steps=300):
+    """Fit a softmax (multinomial logistic) head; returns (weights, bias).
+
+    Features are standardized, and the step size comes from the largest
+    eigenvalue of the feature covariance, so plain accelerated gradient
+    descent converges without tuning. The scaling is folded back into the
+    returned weights, which apply to raw embeddings.
+    """
+    features = np.asarray(features, dtype=np.float32)
+    mean = features.mean(axis=0)
+    std = features.std(axis=0) + 1e-6
+    x = (features - mean) / std
+    y = np.eye(num_classes, dtype=np.float32)[targets]
+    count = len(x)
+
+    # Power iteration for the curvature bound of the loss
+    vector = np.ones(x.shape[1], dtype=np.float32) / np.sqrt(x.shape[1])
+    for _ in range(30):
+        vector = x.T @ (x @ vector)
+        vector /= np.linalg.norm(vector) or 1.0
+    largest = float(vector @ (x.T @ (x @ vector))) / count
+    step = 1.0 / (0.5 * largest + l2)
+
+    weights = np.zeros((x.shape[1], num_classes), dtype=np.float32)
+    bias = np.zeros(num_classes, dtype=np.float32)
+    previous_weights, previous_bias = weights, bias
+    for i in range(1, steps + 1):
+        momentum = (i - 1) / (i + 2)
+        look_weights = weights + momentum * (weights - previous_weights)
+        look_bias = bias + momentum * (bias - previous_bias)
+        error = (softmax(x @ look_weights + look_bias) - y) / count
+        previous_weights, previous_bias = weights, bias
+        weights = look_weights - step * (x.T @ error + l2 * look_weights)
+        bias = look_bias - step * error.sum(axis=0)
+
+    return weights / std[:, None], bias - (mean / std) @ weights
+
+
+def save_head(path, weights, bias, classes, identity):
+    """Write the head atomically, next to where it will be read."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".pet_head_")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            np.savez(handle, weights=weights, bias=bias, classes=np.array(classes), identity=np.array(identity))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class PetHead:
+    """A trained head on top of the MobileNetV2 backbone.
+
+    Classifying is one backbone pass plus one (N, 1280) x (1280, classes)
+    product, and images already in the store skip the backbone too.
+    """
+
+    def __init__(self, head_path=DEFAULT_HEAD_PATH, store_path=DEFAULT_STORE_PATH, backbone=None):
+        if not os.path.exists(head_path):
+            raise FileNotFoundError(f"{head_path} not found; run: python cats_dogs_head.py train photos/")
+        with np.load(head_path) as data:
+            self.weights = data["weights"]
+            self.bias = data["bias"]
+            self.classes = [str(name) for name in data["classes"]]
+            identity = str(data["identity"])
+        self.backbone = backbone or create_backbone()
+        if backbone_identity(self.backbone) != identity:
+            raise ValueError("the head was trained on another backbone; train it again")
+        self.store = EmbeddingStore(identity, store_path)
+
+    def predict(self, embeddings):
+        """Class probabilities for an (N, 1280) array of embeddings."""
+        return softmax(np.asarray(embeddings, dtype=np.float32) @ self.weights + self.bias)
+
+    def classify_files(self, paths, batch_size=None):
+        """Yield (path, label, probability) for every image that could be read."""
+        digests = embed_images(paths, self.store, self.backbone, batch_size, progress=None)
+        readable = [path for path in paths if path in digests]
+        if not readable:
+            return
+        probabilities = self.predict(self.store.get_many([digests[path] for path in readable]))
+        for path, row in zip(readable, probabilities):
+            best = int(row.argmax())
+            yield path, self.classes[best], float(row[best])
+
+
+def train(directory, head_path, store_path, holdout, l2, steps, batch_size, seed=0):
+    """Embed a labeled folder (reusing stored embeddings) and fit a head on it."""
+    pairs = list(labeled_images(directory))
+    classes = sorted({label for _, label in pairs})
+    if len(classes) < 2:
+        raise SystemExit(f"need images in at least two subfolders of {directory}, e.g. cat/ and dog/")
+
+    start = time.perf_counter()
+    backbone = create_backbone()
+    identity = backbone_identity(backbone)
+    store = EmbeddingStore(identity, store_path)
+    before = len(store)
+    digests = embed_images([path for path, _ in pairs], store, backbone, batch_size)
+    pairs = [(path, label) for path, label in pairs if path in digests]
+    print(
+        f"{len(pairs)} labeled images, {len(store) - before} newly embedded "
+        f"in {time.perf_counter() - start:.1f}s",
+        file=sys.stderr
+    )
+
+    features = store.get_many([digests[path] for path, _ in pairs])
+    targets = np.array([classes.index(label) for _, label in pairs])
+    order = np.random.default_rng(seed).permutation(len(pairs))
+    split = int(len(order) * holdout)
+    test, fit = order[:split], order[split:]
+
+    start = time.perf_counter()
+    weights, bias = train_head(features[fit], targets[fit], len(classes), l2, steps)
+    elapsed = time.perf_counter() - start
+
+    accuracy = np.mean((features[fit] @ weights + bias).argmax(axis=1) == targets[fit])
+    report = f"Trained a {len(classes)}-class head in {elapsed:.2f}s: train accuracy {accuracy:.1%}"
+    if len(test):
+        accuracy = np.mean((features[test] @ weights + bias).argmax(axis=1) == targets[test])
+        report += f", holdout accuracy {accuracy:.1%} on {len(test)} images"
+    print(report, file=sys.stderr)
+
+    save_head(head_path, weights, bias, classes, identity)
+    return head_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify with a head trained on MobileNetV2 embeddings")
+    parser.add_argument("--head", default=DEFAULT_HEAD_PATH, help="trained head file")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="embedding store directory")
+    parser.add_argument("-b", "--batch-size", type=int, default=default_batch_size())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fit = commands.add_parser("train", help="train on a folder with one subfolder per label")
+    fit.add_argument("images", help="directory with e.g. cat/ and dog/ subfolders")
+    fit.add_argument("--holdout", type=float, default=0.2, help="fraction held out to report accuracy")
+    fit.add_argument("--l2", type=float, default=1e-3, help="weight decay")
+    fit.add_argument("--steps", type=int, default=300)
+
+    classify = commands.add_parser("classify", help="classify image files")
+    classify.add_argument("images", nargs="+")
+
+    args = parser.parse_args(argv)
+    if not TF_AVAILABLE:
+        parser.error("TensorFlow is required: pip install tensorflow pillow numpy")
+
+    if args.command == "train":
+        path = train(args.images, args.head, args.store, args.holdout, args.l2, args.steps, args.batch_size)
+        print(f"Wrote {path}", file=sys.stderr)
+    else:
+        head = PetHead(args.head, args.store)
+        for path, label, confidence in head.classify_files(args.images, args.batch_size):
+            print(f"{path}\t{label}\t{confidence:.3f}")
+
+
+if __name__ == "__main__":
+    main()
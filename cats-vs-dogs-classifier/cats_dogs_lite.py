@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Cats vs Dogs Quantized Backend
+Convert MobileNetV2 once to a quantized TFLite file and classify with a light interpreter.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from cats_dogs_cache import keras_identity, tflite_identity
+from cats_vs_dogs_classifier import IMAGE_SIZE, classify_predictions, create_model, load_tensorflow, open_image
+
+# tflite_runtime is the small interpreter-only package; full TensorFlow also works
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    Interpreter = None
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mobilenet_v2_int8.tflite")
+
+# ImageNet class names, cached next to the model so decoding needs no keras
+CLASS_INDEX_NAME = "imagenet_class_index.json"
+
+
+def class_index_path(model_path):
+    return os.path.join(os.path.dirname(os.path.abspath(model_path)), CLASS_INDEX_NAME)
+
+
+def load_image_array(path):
+    """Decode and resize an image into MobileNetV2's [-1, 1] float input."""
+    image = open_image(path, IMAGE_SIZE).resize(IMAGE_SIZE, Image.Resampling.BILINEAR)
+    return np.asarray(image, dtype=np.float32) / 127.5 - 1.0
+
+
+def iter_calibration_images(directory, limit):
+    """Yield single-image batches for int8 calibration."""
+    from cats_dogs_batch import iter_image_files
+    count = 0
+    for path in iter_image_files(directory):
+        try:
+            array = load_image_array(path)
+        except OSError:
+            continue
+        yield [array[np.newaxis]]
+        count += 1
+        if count >= limit:
+            break
+
+
+def convert_model(model_path=DEFAULT_MODEL_PATH, calibration_dir=None, calibration_size=200):
+    """Convert MobileNetV2 to a quantized TFLite file, written atomically.
+
+    With calibration images, weights and activations are quantized to int8.
+    Without them, only weights are (dynamic-range quantization). The model
+    keeps float input and output, so callers feed the same preprocessed
+    arrays either way.
+    """
+    keras = load_tensorflow()
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(create_model())
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if calibration_dir:
+        converter.representative_dataset = lambda: iter_calibration_images(calibration_dir, calibration_size)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    flatbuffer = converter.convert()
+
+    directory = os.path.dirname(os.path.abspath(model_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".mobilenet_v2_")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(flatbuffer)
+        os.replace(temp_path, model_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    # decode_predictions downloads the class index on first use; keep a copy
+    keras.applications.mobilenet_v2.decode_predictions(np.zeros((1, 1000)), top=1)
+    cached = os.path.join(os.path.expanduser("~"), ".keras", "models", CLASS_INDEX_NAME)
+    shutil.copyfile(cached, class_index_path(model_path))
+    return model_path
+
+
+class LiteModel:
+    """MobileNetV2 run through a TFLite interpreter.
+
+    Offers the same predict/decode pair as the Keras backend, so results go
+    through the same cat/dog decision.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, num_threads=None):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run: python cats_dogs_lite.py convert")
+        self.model_path = model_path
+        interpreter_class = Interpreter
+        if interpreter_class is None:
+            import tensorflow as tf
+            interpreter_class = tf.lite.Interpreter
+        self.interpreter = interpreter_class(model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+        with open(class_index_path(model_path), encoding="utf-8") as handle:
+            index = json.load(handle)
+        self.classes = [tuple(index[str(i)]) for i in range(len(index))]
+
+    def identity(self):
+        """Cache identity: changes whenever the .tflite file does."""
+        return tflite_identity(self.model_path)
+
+    def _resize(self, batch_size):
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input["index"], [batch_size, *IMAGE_SIZE, 3])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+
+    def predict(self, images):
+        """Class probabilities for a batch of preprocessed images."""
+        images = np.asarray(images, dtype=np.float32)
+        self._resize(len(images))
+        scale, zero_point = self.input["quantization"]
+        if self.input["dtype"] != np.float32:
+            images = np.round(images / scale + zero_point).astype(self.input["dtype"])
+        self.interpreter.set_tensor(self.input["index"], images)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output["index"])
+        scale, zero_point = self.output["quantization"]
+        if self.output["dtype"] != np.float32:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def decode(self, predictions, top=5):
+        """Same (class_id, class_name, confidence) lists as keras decode_predictions."""
+        results = []
+        for row in predictions:
+            best = np.argsort(row)[::-1][:top]
+            results.append([(*self.classes[i], float(row[i])) for i in best])
+        return results
+
+    def classify(self, image_array):
+        """Return (label, cat_confidence, dog_confidence) for one image."""
+        labels, scores = classify_predictions(self.predict(image_array[np.newaxis]))
+        return str(labels[0]), float(scores[0, 0]), float(scores[0, 1])
+
+
+class KerasModel:
+    """The full Keras MobileNetV2, with the same predict/decode pair as LiteModel."""
+
+    def __init__(self, model=None):
+        self.keras = load_tensorflow()
+        self.model = model or create_model()
+
+    def identity(self):
+        return keras_identity(self.model)
+
+    def predict(self, images):
+        return self.model(images, training=False).numpy()
+
+    def decode(self, predictions, top=5):
+        return self.keras.applications.mobilenet_v2.decode_predictions(predictions, top=top)
+
+
+def create_backend(name, model_path=DEFAULT_MODEL_PATH, num_threads=None):
+    if name == "tflite":
+        return LiteModel(model_path, num_threads)
+    return KerasModel()
+
+
+def measure_backend(name, paths, model_path, num_threads, batch_size):
+    """Time one backend in this process; returns a JSON-ready dict."""
+    start = time.perf_counter()
+    backend = create_backend(name, model_path, num_threads)
+    load_time = time.perf_counter() - start
+    images = np.stack([load_image_array(path) for path in paths])
+
+    backend.predict(images[:1])  # warm up
+    start = time.perf_counter()
+    for image in images:
+        backend.predict(image[np.newaxis])
+    latency = (time.perf_counter() - start) / len(images)
+
+    start = time.perf_counter()
+    predictions = np.concatenate([
+        backend.predict(images[i:i + batch_size]) for i in range(0, len(images), batch_size)
+    ])
+    throughput = len(images) / (time.perf_counter() - start)
+
+    labels = classify_predictions(predictions)[0].tolist()
+    top_classes = predictions.argmax(axis=1).tolist()
+    return {
+        "backend": name,
+        "load_s": load_time,
+        "latency_ms": latency * 1000,
+        "images_per_s": throughput,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "labels": labels,
+        "top_classes": top_classes
+    }
+
+
+def run_benchmark(directory, limit, model_path, num_threads, batch_size):
+    """Measure each backend in its own process, so memory figures do not mix."""
+    from cats_dogs_batch import iter_image_files
+    paths = [path for _, path in zip(range(limit), iter_image_files(directory))]
+    if not paths:
+        raise SystemExit(f"no images under {directory}")
+
+    results = []
+    for name in ("keras", "tflite"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__),
+             "--model-path", model_path, "--threads", str(num_threads or 0),
+             "measure", name, "--batch-size", str(batch_size), *paths],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{len(paths)} images, batch size {batch_size}")
+    print(f"{'backend':<8}{'load s':>8}{'ms/image':>10}{'images/s':>10}{'peak MB':>9}")
+    for result in results:
+        print(
+            f"{result['backend']:<8}{result['load_s']:>8.1f}{result['latency_ms']:>10.1f}"
+            f"{result['images_per_s']:>10.1f}{result['peak_rss_mb']:>9.0f}"
+        )
+    keras_result, lite_result = results
+    label_agreement = np.mean([a == b for a, b in zip(keras_result["labels"], lite_result["labels"])])
+    top_agreement = np.mean([a == b for a, b in zip(keras_result["top_classes"], lite_result["top_classes"])])
+    print(f"cat/dog label agreement: {label_agreement:.1%}, top-1 class agreement: {top_agreement:.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantized TFLite backend for the cats vs dogs classifier")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--threads", type=int, default=0, help="interpreter threads (default: all cores)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert MobileNetV2 to a quantized .tflite file")
+    convert.add_argument("--calibration", help="image folder for full int8 quantization")
+    convert.add_argument("--calibration-size", type=int, default=200)
+
+    classify = commands.add_parser("classify", help="classify image files")
+    classify.add_argument("images", nargs="+")
+
+    benchmark = commands.add_parser("benchmark", help="compare Keras and TFLite latency, memory and labels")
+    benchmark.add_argument("images", help="directory of images")
+    benchmark.add_argument("--limit", type=int, default=200)
+    benchmark.add_argument("--batch-size", type=int, default=32)
+
+    measure = commands.add_parser("measure")  # used by benchmark, one backend per process
+    measure.add_argument("backend", choices=["keras", "tflite"])
+    measure.add_argument("images", nargs="+")
+    measure.add_argument("--batch-size", type=int, default=32)
+
+    args = parser.parse_args(argv)
+    threads = args.threads or None
+    if args.command == "convert":
+        start = time.perf_counter()
+        path = convert_model(args.model_path, args.calibration, args.calibration_size)
+        size = os.path.getsize(path) / 1e6
+        print(f"Wrote {path} ({size:.1f} MB) in {time.perf_counter() - start:.0f}s", file=sys.stderr)
+    elif args.command == "classify":
+        model = LiteModel(args.model_path, threads)
+        for path in args.images:
+            label, cat_confidence, dog_confidence = model.classify(load_image_array(path))
+            print(f"{path}\t{label}\tcat {cat_confidence:.3f}\tdog {dog_confidence:.3f}")
+    elif args.command == "benchmark":
+        run_benchmark(args.images, args.limit, args.model_path, args.threads, args.batch_size)
+    else:
+        print(json.dumps(measure_backend(args.backend, args.images, args.model_path, threads, args.batch_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,164 @@ Cats vs Dogs Image Classifier
 A single-file application for classifying images as cats or dogs using a pre-trained deep learning model.
 """
 
+import time
+
+# Measured from here, so the reported startup times include imports
+START_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 import numpy as np
 import io
 import base64
+import importlib.util
+import sys
+import threading
+import queue
+import sqlite3
+
+from cats_dogs_cache import PIL_PIPELINE, PredictionCache, file_digest, keras_identity
+
+# TensorFlow takes seconds to import, so it is only located here and
+# imported by load_tensorflow when a model is first needed
+TF_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+tf = None
+keras = None
+
+# How often the window checks on the background model load and on classification results
+POLL_MS = 100
+
+# Input size of MobileNetV2
+IMAGE_SIZE = (224, 224)
+
+# Bounding box of the preview shown in the window
+DISPLAY_SIZE = (400, 400)
+
+# ImageNet class indices of the domestic cats (tabby to Egyptian cat) and
+# of the dog breeds (Chihuahua to Mexican hairless)
+CAT_CLASSES = np.arange(281, 286)
+DOG_CLASSES = np.arange(151, 269)
+
+# One column per animal, so predictions @ PET_MASKS sums each one's probability
+PET_MASKS = np.zeros((1000, 2), dtype=np.float32)
+PET_MASKS[CAT_CLASSES, 0] = 1
+PET_MASKS[DOG_CLASSES, 1] = 1
+
+PET_LABELS = np.array(['unknown', 'cat', 'dog'])
+
+# Below this confidence an image is neither a clear cat nor a clear dog
+MIN_CONFIDENCE = 0.1
 
-# Try to import tensorflow, handle if not available
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+
+def load_tensorflow():
+    """Import TensorFlow on first use and return the keras module."""
+    global tf, keras
+    if keras is None:
+        import tensorflow
+        tf = tensorflow
+        keras = tensorflow.keras
+    return keras
+
+
+def create_model():
+    """Build MobileNetV2 with ImageNet weights."""
+    load_tensorflow()
+    return keras.applications.MobileNetV2(
+        weights='imagenet',
+        include_top=True,
+        input_shape=IMAGE_SIZE + (3,)
+    )
+
+
+def open_image(path, size):
+    """Decode an image at the smallest scale that still covers size.
+    
+    JPEGs are decoded straight at a reduced scale (draft mode), and other
+    formats are shrunk by an integer factor right after decoding, so a 20+
+    megapixel photo never lives in memory at full resolution for long.
+    path may also be an opened, not yet decoded, PIL image.
+    """
+    if isinstance(path, Image.Image):
+        path.draft('RGB', size)
+        image = path.convert('RGB')
+    else:
+        with Image.open(path) as image:
+            image.draft('RGB', size)
+            image = image.convert('RGB')
+    factor = min(image.width // size[0], image.height // size[1])
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image
+
+
+def decode_image(path, display_size=DISPLAY_SIZE):
+    """Decode once and return (display thumbnail, model input image).
+    
+    Both are new images cut from the same decode; neither is resized from
+    the other. path may also be an opened PIL image, as for open_image.
+    """
+    decode_size = (max(display_size[0], IMAGE_SIZE[0]), max(display_size[1], IMAGE_SIZE[1]))
+    image = open_image(path, decode_size)
+    display = image.copy()
+    display.thumbnail(display_size, Image.Resampling.LANCZOS)
+    return display, image.resize(IMAGE_SIZE, Image.Resampling.BILINEAR)
+
+
+def _measure_decode(path, draft):
+    """Decode path in this process and return (seconds, peak RSS growth in bytes, pixels).
+    
+    Run in a fresh process, so the RSS high-water mark starts at the current
+    size and PIL's buffers, which tracemalloc cannot see, are counted.
+    """
+    import resource
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes
+    unit = 1 if sys.platform == 'darwin' else 1024
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with Image.open(path) as image:
+        pixels = image.width * image.height
+        if draft:
+            decode_image(image)
+        else:
+            image.convert('RGB')
+    seconds = time.perf_counter() - start
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * unit
+    return seconds, peak, pixels
+
+
+def benchmark_decode(paths):
+    """Print decode time and peak memory growth, full decode against decode_image."""
+    from concurrent.futures import ProcessPoolExecutor
+    
+    print(f"{'image':<30}{'pixels':>12}{'full ms':>9}{'full MB':>9}{'draft ms':>10}{'draft MB':>10}")
+    for path in paths:
+        results = []
+        for draft in (False, True):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results.append(pool.submit(_measure_decode, path, draft).result())
+        (full_time, full_peak, pixels), (draft_time, draft_peak, _) = results
+        
+        name = path.split('/')[-1][:29]
+        print(
+            f"{name:<30}{pixels:>12}{full_time * 1000:>9.0f}{full_peak / 1e6:>9.1f}"
+            f"{draft_time * 1000:>10.0f}{draft_peak / 1e6:>10.1f}"
+        )
+
+
+def classify_predictions(predictions):
+    """Cat/dog decisions for an (N, 1000) matrix of ImageNet probabilities.
+    
+    The probabilities of all cat classes and of all dog classes are summed
+    with one matrix product. Returns (labels, scores) where labels holds
+    'cat', 'dog' or 'unknown' and scores is an (N, 2) array of cat and dog
+    confidence.
+    """
+    scores = np.asarray(predictions, dtype=np.float32) @ PET_MASKS
+    cat, dog = scores[:, 0], scores[:, 1]
+    codes = np.where((cat > dog) & (cat > MIN_CONFIDENCE), 1, 0)
+    codes = np.where((dog > cat) & (dog > MIN_CONFIDENCE), 2, codes)
+    return PET_LABELS[codes], scores
 
 
 class CatsDogsClassifier:
@@ -26,9 +170,25 @@ class CatsDogsClassifier:
         self.window.title("Cats vs Dogs Classifier")
         self.window.geometry("800x700")
         self.model = None
-        self.current_image = None
-        self.current_image_path = None
+        self.model_ready = False
+        self.model_thread = None
+        self.model_result = None
+        self.cache = None
+        self.first_prediction_reported = False
+        # Uploaded images waiting for Classify, as (path, display, model_image, digest)
+        self.loaded_images = []
+        # Inference runs on one worker thread; jobs go in, results come back
+        # through poll_results. Cancel bumps the generation, so queued jobs of
+        # an older generation are skipped and late results are dropped.
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.pending = 0
+        self.poll_id = None
+        self.worker = threading.Thread(target=self.classify_worker, daemon=True)
+        self.worker.start()
         self.setup_ui()
+        self.window.after_idle(self.report_first_window)
         self.load_model()
     
     def setup_ui(self):
@@ -52,7 +212,7 @@ class CatsDogsClassifier:
         # Upload button
         upload_btn = tk.Button(
             button_frame,
-            text="Upload Image",
+            text="Upload Images",
             command=self.upload_image,
             font=("Arial", 12, "bold"),
             bg="#2196F3",
@@ -76,6 +236,20 @@ class CatsDogsClassifier:
         )
         self.classify_btn.pack(side=tk.LEFT, padx=5)
         
+        # Cancel button
+        self.cancel_btn = tk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_classification,
+            font=("Arial", 12),
+            bg="#FF9800",
+            fg="white",
+            padx=20,
+            pady=10,
+            state=tk.DISABLED
+        )
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        
         # Clear button
         clear_btn = tk.Button(
             button_frame,
@@ -143,67 +317,109 @@ class CatsDogsClassifier:
         )
         self.status_label.pack(pady=5)
     
+    def report_timing(self, event):
+        """Print the seconds from startup to an event on stderr."""
+        elapsed = time.perf_counter() - START_TIME
+        print(f"Time to {event}: {elapsed:.2f}s", file=sys.stderr)
+        return elapsed
+    
+    def report_first_window(self):
+        self.report_timing("first window")
+    
     def load_model(self):
-        """Load or create a simple model for classification."""
+        """Start building the model on a background thread."""
         if not TF_AVAILABLE:
+            self.model_ready = True
             self.status_label.config(
                 text="TensorFlow not available - using simple rule-based classifier",
                 fg="orange"
             )
             return
         
+        self.status_label.config(text="Loading model in the background...", fg="gray")
+        self.model_thread = threading.Thread(target=self.build_model, daemon=True)
+        self.model_thread.start()
+        self.window.after(POLL_MS, self.check_model)
+    
+    def build_model(self):
+        """Worker thread: import TensorFlow and build the model, touching no widgets."""
         try:
-            # Create a simple CNN model (MobileNetV2-based for efficiency)
-            self.model = keras.applications.MobileNetV2(
-                weights='imagenet',
-                include_top=True,
-                input_shape=(224, 224, 3)
-            )
-            self.status_label.config(text="Model loaded successfully", fg="green")
+            model = create_model()
+            self.model_result = (model, keras_identity(model), None)
         except Exception as e:
+            self.model_result = (None, None, e)
+    
+    def check_model(self):
+        """Main thread: finish loading once the worker is done."""
+        if self.model_thread.is_alive():
+            self.window.after(POLL_MS, self.check_model)
+            return
+        self.model, identity, error = self.model_result
+        self.model_ready = True
+        if error is None:
+            try:
+                self.cache = PredictionCache(identity, PIL_PIPELINE)
+            except sqlite3.Error as e:
+                print(f"Prediction cache disabled: {e}", file=sys.stderr)
+            elapsed = self.report_timing("model ready")
+            self.status_label.config(text=f"Model loaded successfully in {elapsed:.1f}s", fg="green")
+        else:
             self.status_label.config(
-                text=f"Model loading failed: {str(e)}",
+                text=f"Model loading failed: {str(error)}",
                 fg="red"
             )
-            self.model = None
+        if self.loaded_images:
+            self.classify_btn.config(state=tk.NORMAL)
     
     def upload_image(self):
-        """Upload and display an image."""
-        file_path = filedialog.askopenfilename(
-            title="Select an image",
+        """Upload one or more images and display the first."""
+        file_paths = filedialog.askopenfilenames(
+            title="Select images",
             filetypes=[
                 ("Image files", "*.jpg *.jpeg *.png *.bmp *.gif"),
                 ("All files", "*.*")
             ]
         )
         
-        if file_path:
+        loaded = []
+        failed = []
+        for file_path in file_paths:
             try:
-                # Load and display image
-                image = Image.open(file_path)
-                self.current_image = image
-                self.current_image_path = file_path
-                
-                # Resize for display
-                display_size = (400, 400)
-                image.thumbnail(display_size, Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(image)
-                
-                self.image_label.config(image=photo, text="")
-                self.image_label.image = photo  # Keep a reference
-                
-                # Enable classify button
-                self.classify_btn.config(state=tk.NORMAL)
-                self.result_label.config(text="Ready to classify")
-                self.status_label.config(text=f"Loaded: {file_path.split('/')[-1]}", fg="blue")
-            
+                # Decode once into a preview and a model-sized image
+                display, model_image = decode_image(file_path)
+                loaded.append((file_path, display, model_image, file_digest(file_path)))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+                failed.append(f"{file_path.split('/')[-1]}: {str(e)}")
+        
+        if failed:
+            messagebox.showerror("Error", "Failed to load image:\n" + "\n".join(failed))
+        if not loaded:
+            return
+        
+        self.loaded_images = loaded
+        self.show_preview(loaded[0][1])
+        
+        # Enable classify button once there is something to classify with
+        name = loaded[0][0].split('/')[-1]
+        if len(loaded) > 1:
+            name = f"{name} and {len(loaded) - 1} more"
+        if self.model_ready:
+            self.classify_btn.config(state=tk.NORMAL)
+            self.result_label.config(text="Ready to classify", fg="black", font=("Arial", 14))
+            self.status_label.config(text=f"Loaded: {name}", fg="blue")
+        else:
+            self.result_label.config(text="Waiting for the model...", fg="black", font=("Arial", 14))
+            self.status_label.config(text=f"Loaded: {name} - model still loading", fg="blue")
+    
+    def show_preview(self, display):
+        photo = ImageTk.PhotoImage(display)
+        self.image_label.config(image=photo, text="")
+        self.image_label.image = photo  # Keep a reference
     
     def preprocess_image(self, image):
         """Preprocess image for model input."""
         # Resize to model input size
-        img = image.resize((224, 224))
+        img = image.resize(IMAGE_SIZE)
         # Convert to array
         img_array = np.array(img)
         # Ensure 3 channels (RGB)
@@ -216,41 +432,39 @@ class CatsDogsClassifier:
         img_array = keras.applications.mobilenet_v2.preprocess_input(img_array)
         return img_array
     
-    def classify_with_model(self, image):
+    def classify_with_model(self, image, digest=None):
         """Classify using the deep learning model."""
         try:
-            # Preprocess
-            processed_img = self.preprocess_image(image)
+            # Reuse the stored prediction if this exact image was seen before
+            probabilities = None
+            if self.cache is not None and digest:
+                probabilities = self.cache.get(digest)
             
-            # Predict
-            predictions = self.model.predict(processed_img, verbose=0)
+            if probabilities is None:
+                # Preprocess
+                processed_img = self.preprocess_image(image)
+                
+                # Predict
+                probabilities = self.model.predict(processed_img, verbose=0)[0]
+                if self.cache is not None and digest:
+                    self.cache.put(digest, probabilities)
+            predictions = probabilities[np.newaxis]
             
             # Decode predictions (ImageNet classes)
             decoded = keras.applications.mobilenet_v2.decode_predictions(predictions, top=5)[0]
             
-            # Check for cat or dog related classes
-            cat_classes = ['tabby', 'tiger_cat', 'persian_cat', 'siamese_cat', 'egyptian_cat']
-            dog_classes = ['golden_retriever', 'labrador_retriever', 'german_shepherd', 
-                          'beagle', 'bulldog', 'pug', 'chihuahua', 'pomeranian']
-            
-            cat_confidence = 0
-            dog_confidence = 0
-            
             result_text = "\nTop 5 Predictions:\n"
             for i, (class_id, class_name, confidence) in enumerate(decoded, 1):
                 result_text += f"{i}. {class_name}: {confidence*100:.2f}%\n"
-                
-                # Check if it's a cat or dog
-                if any(cat in class_name.lower() for cat in ['cat', 'tabby', 'persian', 'siamese', 'egyptian']):
-                    cat_confidence = max(cat_confidence, confidence)
-                if any(dog in class_name.lower() for dog in ['dog', 'retriever', 'shepherd', 'beagle', 'bulldog', 'pug', 'chihuahua', 'pomeranian', 'terrier']):
-                    dog_confidence = max(dog_confidence, confidence)
             
-            # Determine result
-            if cat_confidence > dog_confidence and cat_confidence > 0.1:
+            # Determine result from the whole distribution, not just the top 5
+            labels, scores = classify_predictions(predictions)
+            label = labels[0]
+            cat_confidence, dog_confidence = scores[0]
+            if label == 'cat':
                 final_result = f"🐱 CAT (Confidence: {cat_confidence*100:.1f}%)"
                 color = "blue"
-            elif dog_confidence > cat_confidence and dog_confidence > 0.1:
+            elif label == 'dog':
                 final_result = f"🐶 DOG (Confidence: {dog_confidence*100:.1f}%)"
                 color = "green"
             else:
@@ -282,42 +496,104 @@ class CatsDogsClassifier:
             return "🐱 CAT (Simple heuristic)", "blue", "Using basic color analysis (not ML)"
     
     def classify_image(self):
-        """Classify the current image."""
-        if self.current_image is None:
+        """Queue the uploaded images for classification on the worker thread."""
+        if not self.loaded_images:
             messagebox.showwarning("No Image", "Please upload an image first.")
             return
         
-        # Show progress
+        for path, display, image, digest in self.loaded_images:
+            self.jobs.put((self.generation, path, display, image, digest))
+        self.pending += len(self.loaded_images)
+        self.loaded_images = []
+        self.classify_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        
+        # Show progress; the main loop stays free, so the bar animates
         self.progress.pack(pady=5)
         self.progress.start()
-        self.status_label.config(text="Classifying...", fg="blue")
-        self.window.update()
+        self.status_label.config(text=f"Classifying... {self.pending} queued", fg="blue")
+        if self.poll_id is None:
+            self.poll_id = self.window.after(POLL_MS, self.poll_results)
+    
+    def classify_worker(self):
+        """Worker thread: classify queued images one at a time, touching no widgets."""
+        while True:
+            generation, path, display, image, digest = self.jobs.get()
+            if generation != self.generation:
+                continue  # cancelled before it started
+            try:
+                if TF_AVAILABLE and self.model is not None:
+                    outcome = self.classify_with_model(image, digest)
+                else:
+                    outcome = self.classify_with_simple_rules(image)
+                error = None
+            except Exception as e:
+                outcome, error = None, e
+            self.results.put((generation, path, display, outcome, error))
+    
+    def poll_results(self):
+        """Main thread: show finished classifications and keep polling while any are pending."""
+        self.poll_id = None
+        while True:
+            try:
+                generation, path, display, outcome, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation:
+                continue  # finished after it was cancelled
+            self.pending -= 1
+            self.show_result(path, display, outcome, error)
         
-        try:
-            if TF_AVAILABLE and self.model is not None:
-                result, color, details = self.classify_with_model(self.current_image)
-            else:
-                result, color, details = self.classify_with_simple_rules(self.current_image)
-            
-            # Display result
-            self.result_label.config(text=result, fg=color, font=("Arial", 18, "bold"))
-            if details:
-                self.result_label.config(text=result + "\n\n" + details)
-            
-            self.status_label.config(text="Classification complete", fg="green")
+        if self.pending:
+            self.poll_id = self.window.after(POLL_MS, self.poll_results)
+        else:
+            self.finish_classification()
+    
+    def show_result(self, path, display, outcome, error):
+        """Display one finished classification."""
+        name = path.split('/')[-1]
+        self.show_preview(display)
+        if error is not None:
+            self.result_label.config(text=f"Classification failed: {str(error)}", fg="red", font=("Arial", 14))
+            self.status_label.config(text=f"{name}: classification failed", fg="red")
+            return
         
-        except Exception as e:
-            messagebox.showerror("Error", f"Classification failed: {str(e)}")
-            self.status_label.config(text="Classification failed", fg="red")
+        result, color, details = outcome
+        self.result_label.config(text=result, fg=color, font=("Arial", 18, "bold"))
+        if details:
+            self.result_label.config(text=result + "\n\n" + details)
         
-        finally:
-            self.progress.stop()
-            self.progress.pack_forget()
+        status = f"Classified {name}"
+        if self.pending:
+            status += f" - {self.pending} more queued"
+        if not self.first_prediction_reported:
+            self.first_prediction_reported = True
+            elapsed = self.report_timing("first prediction")
+            status += f" ({elapsed:.1f}s after startup)"
+        self.status_label.config(text=status, fg="blue" if self.pending else "green")
+    
+    def finish_classification(self):
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.cancel_btn.config(state=tk.DISABLED)
+    
+    def cancel_classification(self):
+        """Drop every queued image; a prediction already running finishes unseen."""
+        self.generation += 1
+        self.pending = 0
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        self.finish_classification()
+        self.status_label.config(text="Classification cancelled", fg="orange")
     
     def clear_results(self):
         """Clear all results and reset."""
-        self.current_image = None
-        self.current_image_path = None
+        if self.pending:
+            self.cancel_classification()
+        self.loaded_images = []
         self.image_label.config(image="", text="No image loaded", bg="#f0f0f0")
         self.result_label.config(text="Upload an image to classify", fg="black", font=("Arial", 14))
         self.classify_btn.config(state=tk.DISABLED)
@@ -329,6 +605,10 @@ class CatsDogsClassifier:
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--decode-benchmark":
+        benchmark_decode(sys.argv[2:])
+        sys.exit()
+    
     # Note about dependencies
     if not TF_AVAILABLE:
         print("Note: TensorFlow is not installed. Using simple rule-based classification.")